@@ -0,0 +1,28 @@
+"""
+Benchmarks for lanpong.
+
+Usage: python -m lanpong.bench <benchmark> [options]
+"""
+import argparse
+
+from lanpong.bench import handshake, login, render, tick
+
+BENCHMARKS = {
+    "handshake": handshake,
+    "login": login,
+    "render": render,
+    "tick": tick,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lanpong.bench")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    for name, module in BENCHMARKS.items():
+        module.add_arguments(subparsers.add_parser(name, help=module.__doc__))
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark].run(args)
+
+
+if __name__ == "__main__":
+    main()
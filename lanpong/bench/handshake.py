@@ -0,0 +1,134 @@
+"""SSH handshakes per second, and per core of the server, per host key type."""
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import paramiko
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from lanpong.server.ssh import (
+    CIPHER_PREFERENCE,
+    KEX_PREFERENCE,
+    configure_transport,
+    load_host_keys,
+)
+
+# Host key type, and the signature algorithms a client accepts for it.
+KEY_TYPES = {
+    "ed25519": ["ssh-ed25519"],
+    "rsa": ["rsa-sha2-512", "rsa-sha2-256"],
+}
+
+
+def write_host_key(directory, key_type):
+    """Generates a host key file of the given type, returns its path."""
+    filename = os.path.join(directory, f"host_key_{key_type}")
+    if key_type == "rsa":
+        paramiko.RSAKey.generate(3072).write_private_key_file(filename)
+    else:
+        # paramiko can read Ed25519 keys but not generate them.
+        with open(filename, "wb") as file:
+            file.write(
+                ed25519.Ed25519PrivateKey.generate().private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.OpenSSH,
+                    serialization.NoEncryption(),
+                )
+            )
+    return filename
+
+
+def serve(key_file, kex, ciphers, count, queue):
+    """
+    Accepts count connections one after the other, up to the first
+    authentication attempt.
+
+    Puts the port, then the CPU seconds the server spent, on the queue.
+    """
+    host_keys = load_host_keys(key_file)
+    with socket.create_server(("127.0.0.1", 0)) as server_sock:
+        queue.put(server_sock.getsockname()[1])
+        start = None
+        for _ in range(count):
+            client_socket, _ = server_sock.accept()
+            if start is None:
+                start = time.process_time()
+            transport = paramiko.Transport(client_socket)
+            configure_transport(transport, host_keys, kex, ciphers)
+            transport.start_server(server=paramiko.ServerInterface())
+            # Returns once the client hung up.
+            transport.join()
+            client_socket.close()
+        queue.put(time.process_time() - start)
+
+
+def handshake(port, key_algorithms):
+    """
+    Connects, runs the key exchange (verifying the host key signature) and
+    a first authentication attempt, as every login does.
+    """
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        transport = paramiko.Transport(sock)
+        transport.get_security_options().key_types = key_algorithms
+        transport.start_client(timeout=10)
+        try:
+            transport.auth_none("bench")
+        except paramiko.BadAuthenticationType:
+            pass
+        transport.close()
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=50,
+        help="Handshakes measured per host key type.",
+    )
+    parser.add_argument(
+        "--kex",
+        default=",".join(KEX_PREFERENCE),
+        help="Comma-separated key exchange algorithms offered by the server.",
+    )
+    parser.add_argument(
+        "--ciphers",
+        default=",".join(CIPHER_PREFERENCE),
+        help="Comma-separated ciphers offered by the server.",
+    )
+
+
+def run(args):
+    print(
+        f"{'host key':>10} {'handshakes/s':>13} {'server ms':>10}"
+        f" {'per core/s':>11}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for key_type, key_algorithms in KEY_TYPES.items():
+            key_file = write_host_key(directory, key_type)
+            queue = multiprocessing.Queue()
+            server = multiprocessing.Process(
+                target=serve,
+                args=(
+                    key_file,
+                    args.kex.split(","),
+                    args.ciphers.split(","),
+                    args.count,
+                    queue,
+                ),
+            )
+            server.start()
+            port = queue.get()
+
+            start = time.perf_counter()
+            for _ in range(args.count):
+                handshake(port, key_algorithms)
+            elapsed = time.perf_counter() - start
+            cpu = queue.get()
+            server.join()
+            print(
+                f"{key_type:>10} {args.count / elapsed:>13.1f}"
+                f" {cpu / args.count * 1000:>10.2f} {args.count / cpu:>11.1f}"
+            )
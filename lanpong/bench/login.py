@@ -0,0 +1,85 @@
+"""Password logins per second through the CredentialVerifier, per scrypt cost."""
+import os
+import tempfile
+import time
+
+from lanpong.server.credentials import CredentialVerifier
+from lanpong.server.db import DB
+
+
+def measure(db, usernames, log_n, args):
+    """
+    Logs every user in once, all submitted at the same time.
+
+    Returns:
+        float: Logins per second.
+    """
+    verifier = CredentialVerifier(
+        db,
+        n=2**log_n,
+        r=args.r,
+        p=args.p,
+        workers=args.workers,
+        max_pending=len(usernames),
+    )
+    try:
+        # Hash with the measured cost first, so no login pays for a rehash.
+        hashes = verifier.executor.map(verifier.hash, ["password"] * len(usernames))
+        for username, hashed in zip(usernames, hashes):
+            db.update_user(db.get_user(username)["id"], {"password": hashed})
+
+        start = time.perf_counter()
+        futures = [verifier.login(username, "password") for username in usernames]
+        assert all(future.result() is not None for future in futures)
+        return len(usernames) / (time.perf_counter() - start)
+    finally:
+        verifier.close()
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--logins",
+        type=int,
+        default=200,
+        help="Logins measured per cost.",
+    )
+    parser.add_argument(
+        "--log-n",
+        default="12,14,15",
+        help="Comma-separated scrypt CPU/memory costs, as powers of 2.",
+    )
+    parser.add_argument(
+        "-r",
+        type=int,
+        default=CredentialVerifier.R,
+        help="scrypt block size.",
+    )
+    parser.add_argument(
+        "-p",
+        type=int,
+        default=CredentialVerifier.P,
+        help="scrypt parallelization.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Threads of the verification pool.",
+    )
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        db = DB(os.path.join(directory, "users.json"))
+        usernames = [f"user{i}" for i in range(args.logins)]
+        for username in usernames:
+            db.create_user(username, "password")
+
+        print(f"{'cost':>6} {'logins/s':>10} {'ms/login/worker':>16}")
+        for log_n in map(int, args.log_n.split(",")):
+            rate = measure(db, usernames, log_n, args)
+            print(
+                f"{f'2^{log_n}':>6} {rate:>10.1f}"
+                f" {args.workers / rate * 1000:>16.1f}"
+            )
+        db.close()
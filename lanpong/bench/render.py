@@ -0,0 +1,67 @@
+"""Frames per second of screen serialization (screen_to_tui)."""
+import time
+from itertools import chain
+
+import numpy as np
+
+from lanpong.game.game import Game
+
+# (rows, cols) of the boards to serialize, stats area included.
+SIZES = [
+    (Game.DEFAULT_ROWS + Game.STATS_HEIGHT, Game.DEFAULT_COLS),
+    (100, 300),
+    (500, 1000),
+]
+
+
+def legacy_screen_to_tui(screen):
+    """The per-cell join screen_to_tui used before CRLF-terminated buffers."""
+    return b"".join(
+        chain.from_iterable(chain(row, [b"\r", b"\n"]) for row in screen)
+    ).decode()
+
+
+def measure(func, screen, duration):
+    """
+    Calls func(screen) repeatedly for about duration seconds.
+
+    Returns:
+        float: Calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < duration:
+        func(screen)
+        calls += 1
+    return calls / elapsed
+
+
+def make_screen(rows, cols):
+    """A bordered screen with random printable content."""
+    screen = Game.get_blank_screen(rows, cols, stats_height=0)
+    cells = np.array(list(" *|-"), dtype="S1")
+    rng = np.random.default_rng(0)
+    screen[1:-1, 1:-1] = rng.choice(cells, size=(rows - 2, cols - 2))
+    return screen
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=1.0,
+        help="Seconds spent measuring each implementation and size.",
+    )
+
+
+def run(args):
+    print(f"{'board':>10} {'legacy fps':>12} {'current fps':>12} {'speedup':>8}")
+    for rows, cols in SIZES:
+        screen = make_screen(rows, cols)
+        assert legacy_screen_to_tui(screen) == Game.screen_to_tui(screen)
+        legacy = measure(legacy_screen_to_tui, screen, args.duration)
+        current = measure(Game.screen_to_tui, screen, args.duration)
+        print(
+            f"{f'{rows}x{cols}':>10} {legacy:>12.0f} {current:>12.0f}"
+            f" {current / legacy:>7.1f}x"
+        )
@@ -0,0 +1,171 @@
+"""Ticks per second of N headless games played by bots, with no SSH involved."""
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import numpy as np
+
+from lanpong.bench.render import measure
+from lanpong.game.engine import PhysicsEngine
+from lanpong.game.game import Game
+from lanpong.server.scheduler import GameScheduler
+
+# Upper edges of the tick latency histogram buckets, in milliseconds.
+HISTOGRAM_EDGES = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, float("inf")]
+# Ticks measured per game count, however long they take.
+MIN_TICKS = 5
+
+
+def bot_key(paddle, ball_row):
+    """The key a bot presses to keep its paddle centered on the ball."""
+    center = paddle.row + paddle.length // 2
+    if ball_row < center:
+        return b"w"
+    if ball_row > center:
+        return b"s"
+    return b" "
+
+
+def play(games):
+    """Lets both bots of every game react to the ball."""
+    for game in games:
+        ball_row = game.ball.get_row()
+        game.update_paddle(1, bot_key(game.paddle1, ball_row))
+        game.update_paddle(2, bot_key(game.paddle2, ball_row))
+
+
+def create_games(count, engine):
+    """
+    Creates count started games of two bots each, that never end.
+
+    Returns:
+        (list, float): The games and the memory they take, in bytes per game.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for _ in range(count):
+        game = Game(engine=engine, game_length=float("inf"))
+        for player_id in (
+            game.initialize_player("bot1"),
+            game.initialize_player("bot2"),
+        ):
+            game.set_player_ready(player_id, True)
+        games.append(game)
+    size = tracemalloc.get_traced_memory()[0] - before
+    if not tracing:
+        tracemalloc.stop()
+    return games, size / count
+
+
+def measure_ticks(count, duration, batched, watched=False):
+    """
+    Runs the game tick of count games for about duration seconds.
+
+    Args:
+        count (int): Number of games.
+        duration (float): Seconds to measure for, at least MIN_TICKS ticks.
+        batched (bool): Advance the games with a single `PhysicsEngine.step`
+            as the server does, else with `Game.update_game` one by one.
+        watched (bool): Give every game a viewer, so its frames are encoded.
+
+    Returns:
+        (np.ndarray, float): Duration of every tick in milliseconds, and
+        memory per game in bytes.
+    """
+    engine = PhysicsEngine()
+    games, memory = create_games(count, engine)
+    # Given another engine, the scheduler updates every game on its own.
+    scheduler = GameScheduler(engine=engine if batched else PhysicsEngine())
+    for game in games:
+        scheduler.add(game)
+
+    latencies = []
+    with ExitStack() as viewers:
+        if watched:
+            for game in games:
+                viewers.enter_context(game.broadcaster.watch(spectator=False))
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration or len(latencies) < MIN_TICKS:
+            tick_start = time.perf_counter()
+            play(games)
+            scheduler.step()
+            latencies.append((time.perf_counter() - tick_start) * 1000)
+    return np.array(latencies), memory
+
+
+def format_histogram(latencies):
+    """Counts of ticks per latency bucket, e.g. "<=1ms 12  <=2.5ms 3"."""
+    counts, _ = np.histogram(latencies, bins=[0] + HISTOGRAM_EDGES)
+    return "  ".join(
+        f"<={edge:g}ms {count}" if edge != float("inf") else f">{last:g}ms {count}"
+        for edge, last, count in zip(HISTOGRAM_EDGES, [0] + HISTOGRAM_EDGES, counts)
+        if count
+    )
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--games",
+        default="1,10,100,1000,10000",
+        help="Comma-separated numbers of concurrent games.",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=2.0,
+        help="Seconds spent measuring each number of games.",
+    )
+    parser.add_argument(
+        "--per-game",
+        action="store_true",
+        help="Advance games one by one with Game.update_game instead of the "
+        "batched PhysicsEngine.step.",
+    )
+    parser.add_argument(
+        "--watched",
+        action="store_true",
+        help="Give every game a viewer, so the tick encodes its frames too.",
+    )
+
+
+def run(args):
+    counts = [int(count) for count in args.games.split(",")]
+    histograms = []
+    print(
+        f"{'games':>6} {'ticks/s':>9} {'games/s':>10} {'p50 ms':>8}"
+        f" {'p99 ms':>8} {'max ms':>8} {'KiB/game':>9}"
+    )
+    for count in counts:
+        latencies, memory = measure_ticks(
+            count, args.duration, not args.per_game, args.watched
+        )
+        ticks = 1000 / latencies.mean()
+        print(
+            f"{count:>6} {ticks:>9.1f} {ticks * count:>10.0f}"
+            f" {np.percentile(latencies, 50):>8.3f}"
+            f" {np.percentile(latencies, 99):>8.3f} {latencies.max():>8.3f}"
+            f" {memory / 1024:>9.1f}"
+        )
+        histograms.append((count, format_histogram(latencies)))
+
+    print("\nTick latency histograms:")
+    for count, histogram in histograms:
+        print(f"{count:>6}  {histogram}")
+
+    # Serialization of a game in play, apart from the tick.
+    games, _ = create_games(1, PhysicsEngine())
+    game = games[0]
+    scheduler = GameScheduler(engine=game.engine)
+    scheduler.add(game)
+    for _ in range(10):
+        play(games)
+        scheduler.step()
+    print(f"\n{'serialization':>22} {'calls/s':>10}")
+    for name, func, value in (
+        ("screen_to_tui(screen)", Game.screen_to_tui, game.screen),
+        ("str(game)", str, game),
+    ):
+        print(f"{name:>22} {measure(func, value, args.duration):>10.0f}")
@@ -0,0 +1,164 @@
+import threading
+
+import numpy as np
+
+
+class PhysicsEngine:
+    """
+    Structure-of-arrays physics for many concurrent games.
+
+    Every game owns a slot (an index into the arrays below). `step` advances
+    the ball of every running game with a handful of array operations instead
+    of per-object Python code, moving the paddles first and then the ball.
+    """
+
+    INITIAL_CAPACITY = 64
+    # Column of the row and column components in the (N, 2) arrays.
+    ROW, COL = 0, 1
+    # Index of the left (player 1) and right (player 2) paddles.
+    LEFT, RIGHT = 0, 1
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """
+        Initialize the engine.
+
+        Args:
+            capacity (int): Number of slots to preallocate, grown on demand.
+        """
+        self.lock = threading.Lock()
+        self.capacity = 0
+        # Ball position and velocity, (N, 2) as (row, col).
+        self.ball = np.zeros((0, 2), dtype=np.int64)
+        self.velocity = np.zeros((0, 2), dtype=np.int64)
+        # Paddle top row, column and length, (N, 2) as (left, right).
+        self.paddle_row = np.zeros((0, 2), dtype=np.int64)
+        self.paddle_col = np.zeros((0, 2), dtype=np.int64)
+        self.paddle_length = np.zeros((0, 2), dtype=np.int64)
+        # Paddle direction, -1 (up), 1 (down) or 0, (N, 2) as (left, right).
+        self.paddle_direction = np.zeros((0, 2), dtype=np.int64)
+        # Board size, (N, 2) as (rows, cols).
+        self.bounds = np.zeros((0, 2), dtype=np.int64)
+        # Games that are started and not over yet.
+        self.running = np.zeros(0, dtype=bool)
+        # Time (as in time.time()) until which the game is paused after a goal.
+        self.resume_at = np.zeros(0, dtype=np.float64)
+        self._free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """Resizes every array to the given capacity."""
+        for name in (
+            "ball",
+            "velocity",
+            "paddle_row",
+            "paddle_col",
+            "paddle_length",
+            "paddle_direction",
+            "bounds",
+            "running",
+            "resume_at",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[: self.capacity] = array
+            setattr(self, name, grown)
+        # Hand out low slots first.
+        self._free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def allocate(self, rows, cols):
+        """
+        Reserves a slot for a new game.
+
+        Args:
+            rows (int): The number of rows of the board.
+            cols (int): The number of columns of the board.
+
+        Returns:
+            int: The slot of the game.
+        """
+        with self.lock:
+            if not self._free:
+                self._grow(max(1, self.capacity * 2))
+            slot = self._free.pop()
+            self.bounds[slot] = rows, cols
+            self.running[slot] = False
+            self.resume_at[slot] = 0
+            self.paddle_direction[slot] = 0
+            return slot
+
+    def set(self, name, index, value):
+        """
+        Writes one element of an engine array.
+
+        Taken under the lock, so the write can't land in an array that a
+        concurrent `allocate` is replacing with a grown copy.
+
+        Args:
+            name (str): The name of the array, e.g. "velocity".
+            index: The index of the element, e.g. (slot, column).
+            value: The value to write.
+        """
+        with self.lock:
+            getattr(self, name)[index] = value
+
+    def release(self, slot):
+        """Frees a slot so it can be reused by another game."""
+        with self.lock:
+            self.running[slot] = False
+            self._free.append(slot)
+
+    def step(self, now, slots=None):
+        """
+        Advances the paddles and the ball of several games by one tick.
+
+        Paddles move one row in their direction, staying within the walls.
+        The ball then mirrors `Ball.update_position`, `handle_wall_collision`,
+        `handle_paddle_collision` and `keep_within_bounds`, masked per game.
+
+        Args:
+            now (float): The current time, games paused until later are skipped.
+            slots (np.ndarray): Slots to advance, defaults to every running game.
+
+        Returns:
+            (np.ndarray, np.ndarray): The advanced slots, and for each of them
+            1 if player 1's wall was hit, 2 for player 2's wall, 0 otherwise.
+        """
+        with self.lock:
+            if slots is None:
+                slots = np.flatnonzero(self.running & (self.resume_at <= now))
+            ball = self.ball[slots]
+            velocity = self.velocity[slots]
+            rows, cols = self.bounds[slots, self.ROW], self.bounds[slots, self.COL]
+
+            top = self.paddle_row[slots] + self.paddle_direction[slots]
+            length = self.paddle_length[slots]
+            np.clip(top, 1, rows[:, None] - length - 1, out=top)
+            self.paddle_row[slots] = top
+
+            ball += velocity
+            row, col = ball[:, self.ROW], ball[:, self.COL]
+
+            scores = np.where(col <= 0, 1, np.where(col >= cols - 1, 2, 0))
+            bounce = (scores == 0) & ((row <= 0) | (row >= rows - 1))
+            velocity[bounce, self.ROW] *= -1
+
+            bottom = top + length - 1
+            paddle_col = self.paddle_col[slots]
+            hit = (
+                (paddle_col[:, self.LEFT] + 1 == col)
+                & (top[:, self.LEFT] <= row)
+                & (row <= bottom[:, self.LEFT])
+            ) | (
+                (paddle_col[:, self.RIGHT] - 1 == col)
+                & (top[:, self.RIGHT] <= row)
+                & (row <= bottom[:, self.RIGHT])
+            )
+            velocity[hit, self.COL] *= -1
+
+            np.clip(row, 1, rows - 2, out=row)
+            np.clip(col, 1, cols - 2, out=col)
+
+            self.ball[slots] = ball
+            self.velocity[slots] = velocity
+            return slots, scores
@@ -1,11 +1,14 @@
 import random
 import numpy as np
 import threading
+import weakref
 
-from itertools import chain
 from collections import namedtuple
 import time
 
+from lanpong.game import render
+from lanpong.game.engine import PhysicsEngine
+
 
 class Paddle:
     """
@@ -117,8 +120,64 @@ class Ball:
             self.invert_col_velocity()
 
     def keep_within_bounds(self, rows, cols):
-        self.row = np.clip(self.row, 1, rows - 2)
-        self.col = np.clip(self.col, 1, cols - 2)
+        # Plain min/max, np.clip is much slower on scalars.
+        self.row = min(max(self.row, 1), rows - 2)
+        self.col = min(max(self.col, 1), cols - 2)
+
+
+def engine_field(array, column=None):
+    """
+    Property backed by one element of a PhysicsEngine array.
+    :param array: The name of the engine array.
+    :param column: The column of the element, the view's side if None.
+    """
+
+    def fget(self):
+        return int(
+            getattr(self.engine, array)[
+                self.slot, self.side if column is None else column
+            ]
+        )
+
+    def fset(self, value):
+        self.engine.set(
+            array, (self.slot, self.side if column is None else column), value
+        )
+
+    return property(fget, fset)
+
+
+class BallView(Ball):
+    """
+    Ball whose state lives in a PhysicsEngine slot
+    """
+
+    row = engine_field("ball", PhysicsEngine.ROW)
+    col = engine_field("ball", PhysicsEngine.COL)
+    row_velocity = engine_field("velocity", PhysicsEngine.ROW)
+    col_velocity = engine_field("velocity", PhysicsEngine.COL)
+
+    def __init__(self, engine, slot, *args):
+        self.engine = engine
+        self.slot = slot
+        super().__init__(*args)
+
+
+class PaddleView(Paddle):
+    """
+    Paddle whose state lives in a PhysicsEngine slot
+    """
+
+    row = engine_field("paddle_row")
+    col = engine_field("paddle_col")
+    length = engine_field("paddle_length")
+    direction = engine_field("paddle_direction")
+
+    def __init__(self, engine, slot, side, *args):
+        self.engine = engine
+        self.slot = slot
+        self.side = side
+        super().__init__(*args)
 
 
 class Game:
@@ -128,9 +187,11 @@ class Game:
 
     DEFAULT_ROWS = 24
     DEFAULT_COLS = 70
-    STATS_HEIGHT = 3
+    STATS_HEIGHT = 4
     GAME_LENGTH = 3
     SCORE_DISPLAY_TIME = 2
+    # Physics of every game, advanced in batches by the GameScheduler.
+    engine = PhysicsEngine()
 
     def __init__(
         self,
@@ -138,26 +199,55 @@ class Game:
         cols=DEFAULT_COLS,
         stats_height=STATS_HEIGHT,
         game_length=GAME_LENGTH,
+        engine=None,
     ):
         self.nrows = rows
         self.ncols = cols
+        # Points needed to win.
+        self.game_length = game_length
         self.score = [0, 0]
         self.score_timestamp = 0
         self.most_recent_score = -1
 
         self.is_game_started_event = threading.Event()
-
-        self.ball = Ball(
+        # Set once the second player joined, or once the waiting player was
+        # moved to another game by the Matchmaker.
+        self.is_full_event = threading.Event()
+        self._full_callbacks = []
+        self._full_lock = threading.Lock()
+
+        if engine is not None:
+            self.engine = engine
+        self.slot = self.engine.allocate(self.nrows, self.ncols)
+        # Give the slot back once the game is garbage collected.
+        weakref.finalize(self, self.engine.release, self.slot)
+
+        self.ball = BallView(
+            self.engine,
+            self.slot,
             self.nrows // 2,
             self.ncols // 2,
             1,
             1,
         )
 
-        self.paddle1 = Paddle(self.nrows // 2, 1, 3)
-        self.paddle2 = Paddle(self.nrows // 2, self.ncols - 2, 3)
+        self.paddle1 = PaddleView(
+            self.engine, self.slot, PhysicsEngine.LEFT, self.nrows // 2, 1, 3
+        )
+        self.paddle2 = PaddleView(
+            self.engine,
+            self.slot,
+            PhysicsEngine.RIGHT,
+            self.nrows // 2,
+            self.ncols - 2,
+            3,
+        )
 
         self.screen = Game.get_blank_screen(stats_height=stats_height)
+        # Rows of the screen changed since the last published frame.
+        self._dirty_rows = set()
+        # Whether the last published frame showed the board, not a message.
+        self._board_published = False
         network_header = "Network Statistics:"
         start = (cols - len(network_header)) // 2
         self.screen[-self.STATS_HEIGHT, start : start + len(network_header)] = list(
@@ -167,18 +257,26 @@ class Game:
         self.draw_paddle(self.paddle1)
         self.draw_paddle(self.paddle2)
         # Draw the ball
-        self.screen[self.ball.get_row()][self.ball.get_col()] = Ball.SYMBOL
+        self.draw_ball()
 
         self.player1 = self.player2 = None
 
         self.loser = 0
+        # Guards the screen, written by the game tick and the ping threads.
+        self.screen_lock = threading.Lock()
+
+        # Shares each tick's frame with everyone watching the game.
+        self.broadcaster = render.FrameBroadcaster()
 
     def _reset_paddles(self):
         """Resets the paddles to their original positions"""
         self.screen[1 : self.nrows - 1, 1] = self.screen[1 : self.nrows - 1, -2] = b" "
+        self.mark_dirty(1, self.nrows - 1)
         self.paddle1.row = self.nrows // 2
         self.paddle2.row = self.nrows // 2
         self.paddle1.direction = self.paddle2.direction = 0
+        self.draw_paddle(self.paddle1)
+        self.draw_paddle(self.paddle2)
 
     def _reset_ball(self):
         """Resets the ball to its original position"""
@@ -193,9 +291,30 @@ class Game:
         self._reset_paddles()
         self._reset_ball()
 
+    def draw_ball(self):
+        """Draws the ball on the screen, remembering where it was drawn"""
+        self.ball_cell = (self.ball.get_row(), self.ball.get_col())
+        self.screen[self.ball_cell] = Ball.SYMBOL
+        self.mark_dirty(self.ball_cell[0])
+
     def draw_paddle(self, paddle):
-        """Draws a paddle on the screen"""
+        """Draws a paddle on the screen, remembering where it was drawn"""
+        paddle.drawn_row = paddle.row
         self.screen[paddle.row : paddle.row + paddle.length, paddle.col] = b"|"
+        self.mark_dirty(paddle.row, paddle.row + paddle.length)
+
+    def redraw_paddle(self, paddle):
+        """Moves a paddle on the screen if it moved since it was drawn"""
+        if paddle.row != paddle.drawn_row:
+            self.screen[
+                paddle.drawn_row : paddle.drawn_row + paddle.length, paddle.col
+            ] = b" "
+            self.mark_dirty(paddle.drawn_row, paddle.drawn_row + paddle.length)
+            self.draw_paddle(paddle)
+
+    def mark_dirty(self, start, stop=None):
+        """Records that rows start to stop (start only by default) changed"""
+        self._dirty_rows.update(range(start, start + 1 if stop is None else stop))
 
     def initialize_player(self, username):
         """Initializes a player. Returns non-zero player id, 0 if game is full."""
@@ -206,10 +325,27 @@ class Game:
         elif self.player2 is None:
             self.player2 = Player(self.paddle2, username)
             self.player2.id = 2
+            self.notify_full()
             return 2
         else:
             return 0
 
+    def when_full(self, callback):
+        """Calls callback once the game is full, right away if it is already"""
+        with self._full_lock:
+            if not self.is_full_event.is_set():
+                self._full_callbacks.append(callback)
+                return
+        callback()
+
+    def notify_full(self):
+        """Wakes up whoever waits for the game to be full"""
+        with self._full_lock:
+            self.is_full_event.set()
+            callbacks, self._full_callbacks = self._full_callbacks, []
+        for callback in callbacks:
+            callback()
+
     def set_player_ready(self, player_id, is_ready):
         """Sets the player status to either 'ready' or 'not ready'"""
         player = self.player1 if player_id == 1 else self.player2
@@ -217,6 +353,7 @@ class Game:
         if self.player1.is_ready and (
             self.player2 is not None and self.player2.is_ready
         ):
+            self.engine.set("running", self.slot, True)
             self.is_game_started_event.set()
 
     def update_score(self, player_id):
@@ -228,17 +365,37 @@ class Game:
 
     def check_for_winner(self):
         """Checks if there is a winner and updates the screen"""
-        if self.score[0] >= self.GAME_LENGTH:
+        if self.score[0] >= self.game_length:
             self.loser = 2
-        elif self.score[1] >= self.GAME_LENGTH:
+        elif self.score[1] >= self.game_length:
             self.loser = 1
+        if self.loser != 0:
+            self.engine.set("running", self.slot, False)
+
+    KEYS = (b"w", b"s", b" ")
+
+    def queue_input(self, player_id, data):
+        """
+        Steers a player's paddle with the keys received from the player.
+
+        Args:
+            player_id (int): The player number (1 or 2).
+            data (bytes): Every byte received from the player since the last call.
+        """
+        # Only the most recent paddle key matters.
+        for byte in reversed(data):
+            key = bytes([byte])
+            if key in self.KEYS:
+                self.update_paddle(player_id, key)
+                return
 
     def update_game(self):
         """
         Updates the game state.
 
         This function handles the main logic for updating the game state, including ball movement,
-        collisions, score tracking, and screen updates.
+        collisions, score tracking, and screen updates. The GameScheduler advances
+        many games at once with `PhysicsEngine.step` and `apply_step` instead.
 
         Returns:
             None. Modifies the internal state of the Game object.
@@ -247,53 +404,69 @@ class Game:
         if time.time() - self.score_timestamp < self.SCORE_DISPLAY_TIME:
             return
 
-        # Reset the most recent score, indicating no recent score update
-        self.most_recent_score = -1
-
         # Check if the game is over
         if self.loser != 0:
             # Game is over, don't update anything further
+            self.most_recent_score = -1
             return
 
-        # Erase the ball from its previous position on the screen
-        self.screen[self.ball.get_row()][self.ball.get_col()] = b" "
+        # Move the paddles, then the ball, handling wall and paddle collisions
+        _, scores = self.engine.step(time.time(), np.array([self.slot]))
+        self.apply_step(int(scores[0]))
+
+    def apply_step(self, score):
+        """
+        Updates the score and the screen after the engine advanced the paddles
+        and the ball.
+
+        Args:
+            score (int): The player whose wall was hit (1 or 2), 0 otherwise.
+
+        Returns:
+            None. Modifies the internal state of the Game object.
+        """
+        # Reset the most recent score, indicating no recent score update
+        self.most_recent_score = -1
 
-        # Update the ball's position based on its velocity
-        self.ball.update_position()
+        # Erase the ball from its previous position on the screen
+        self.screen[self.ball_cell] = b" "
+        self.mark_dirty(self.ball_cell[0])
+        self.redraw_paddle(self.paddle1)
+        self.redraw_paddle(self.paddle2)
 
-        # Check for collisions with the walls and update the score if a goal is scored
-        score = self.ball.handle_wall_collision(self.nrows, self.ncols)
         if score != 0:
             # Record the timestamp of the goal for score display
             self.score_timestamp = time.time()
+            self.engine.set(
+                "resume_at", self.slot, self.score_timestamp + self.SCORE_DISPLAY_TIME
+            )
             # Update the most recent score and overall score
             self.most_recent_score = score
             self.update_score(score)
 
-        # Check for collisions with paddles and adjust ball velocity accordingly
-        self.ball.handle_paddle_collision(self.player1.paddle, self.player2.paddle)
-
-        # Ensure the ball stays within the game boundaries
-        self.ball.keep_within_bounds(self.nrows, self.ncols)
-
         # Update the ball position on the screen
-        self.screen[self.ball.get_row()][self.ball.get_col()] = Ball.SYMBOL
+        self.draw_ball()
 
-    def get_message_screen(self, message):
+    @staticmethod
+    def draw_message(message):
+        """Returns a blank screen (no stats area) with the message centered"""
         screen = Game.get_blank_screen(stats_height=0)
         rows, cols = screen.shape
         assert len(message) < cols - 2
 
         start = (cols - len(message)) // 2
         screen[rows // 2, start : start + len(message)] = list(message)
-        return Game.screen_to_tui(screen)
+        return screen
+
+    def get_message_screen(self, message):
+        return Game.screen_to_tui(Game.draw_message(message))
 
     def update_paddle(self, player_number: int, key):
         """
-        Updates the paddle positions based on user input.
+        Updates the paddle direction based on user input.
 
-        This function handles the paddle movement in response to user input.
-        It checks the validity of the input key and ensures that the paddle stays within the game boundaries.
+        The paddle itself moves one row per game tick in its direction, so its
+        speed doesn't depend on how often input arrives.
 
         Args:
             player_number (int): The player number (1 or 2) whose paddle to update.
@@ -315,9 +488,6 @@ class Game:
         player = self.player1 if player_number == 1 else self.player2
         paddle = player.paddle
 
-        # Clear the old paddle position on the screen
-        self.screen[paddle.row : paddle.row + paddle.length, paddle.col] = b" "
-
         # Check if the key is valid and update the paddle direction
         if key == b"w":
             paddle.direction = -1
@@ -326,42 +496,93 @@ class Game:
         elif key == b" ":
             paddle.direction = 0
 
-        # Update the paddle position based on the direction and ensure it stays within bounds
-        if paddle.direction == -1 and paddle.row > 1:
-            paddle.row -= 1
-        elif paddle.direction == 1 and paddle.row < self.nrows - paddle.length - 1:
-            paddle.row += 1
-
-        # Draw the new paddle position on the screen
-        self.draw_paddle(paddle)
-
-    def update_network_stats(self, stats, offset=1):
-        """Updates the network statistics area"""
-        # self.screen[-self.STATS_HEIGHT + 1, 1:-2] = b" "
-        if offset == 1:
-            self.screen[-self.STATS_HEIGHT + 1, 1 : 1 + len(stats)] = list(stats)
-        else:
-            self.screen[-self.STATS_HEIGHT + 1, -1 - len(stats) : -1] = list(stats)
+    def update_network_stats(self, stats, offset=1, line=0):
+        """Updates a line of the player's (offset) half of the network statistics area, cut to fit"""
+        row = -self.STATS_HEIGHT + 1 + line
+        half = self.ncols // 2
+        with self.screen_lock:
+            self.mark_dirty(len(self.screen) + row)
+            if offset == 1:
+                stats = stats[: half - 1]
+                self.screen[row, 1:half] = b" "
+                self.screen[row, 1 : 1 + len(stats)] = list(stats)
+            else:
+                stats = stats[: self.ncols - half - 1]
+                self.screen[row, half:-1] = b" "
+                self.screen[row, -1 - len(stats) : -1] = list(stats)
 
     def is_full(self):
         """Returns True if the game is full, False otherwise"""
         return self.player1 is not None and self.player2 is not None
 
-    def __str__(self):
+    def publish_frame(self):
+        """
+        Encodes the changes of the screen once and shares them with every viewer.
+
+        Called once per tick by the GameScheduler. Only the rows drawn on since
+        the last frame are diffed. Nothing is encoded while nobody watches,
+        the changes add up until the next frame.
+
+        Returns:
+            Frame or None: The new frame, None if nobody watches.
+        """
+        if not self.broadcaster.viewers:
+            return None
+        previous = self.frame
+        with self.screen_lock:
+            screen = self.get_current_screen()
+            board = screen is self.screen
+            rows = sorted(self._dirty_rows) if board and self._board_published else None
+            self._dirty_rows = set()
+            self._board_published = board
+            frame = render.encode_frame(
+                previous.tick + 1 if previous is not None else 0,
+                screen,
+                previous,
+                rows,
+            )
+        self.broadcaster.publish(frame)
+        return frame
+
+    def wait_for_frame(self, tick=-1, timeout=None):
+        """
+        Waits for a frame newer than tick, or for the game to end.
+
+        Args:
+            tick (int): The tick of the last frame the caller has seen.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            Frame or None: The latest frame, None if there is none yet.
+        """
+        return self.broadcaster.wait(tick, timeout)
+
+    @property
+    def frame(self):
+        """The most recent frame, None before the game started."""
+        return self.broadcaster.frame
+
+    def get_current_screen(self):
+        """Returns the screen to display: the board, or the score screen after a goal"""
         if time.time() - self.score_timestamp < self.SCORE_DISPLAY_TIME:
-            return self.get_message_screen(
+            return Game.draw_message(
                 f"{self.player1.username if self.most_recent_score == self.player1.id else self.player2.username} scores! Score: {self.score[0]}-{self.score[1]}"
             )
+        return self.screen
 
-        return Game.screen_to_tui(self.screen)
+    def __str__(self):
+        return Game.screen_to_tui(self.get_current_screen())
 
     @staticmethod
     def get_blank_screen(
         rows=DEFAULT_ROWS, cols=DEFAULT_COLS, stats_height=STATS_HEIGHT
     ):
-        """Return a blank screen with no paddles or ball, just the border"""
+        """
+        Return a blank screen with no paddles or ball, just the border.
+        The screen is a view of a CRLF-terminated buffer (see render.new_screen).
+        """
         rows = rows + stats_height
-        screen = np.full((rows, cols), b" ", dtype="S1")
+        screen = render.new_screen(rows, cols)
         screen[0, :] = screen[-1, :] = screen[-stats_height - 1, :] = b"-"
         screen[:, 0] = screen[:, -1] = b"+"
         return screen
@@ -373,7 +594,4 @@ class Game:
         :param screen: The screen to convert
         :return: The TUI representation of the screen
         """
-        # Code looks ugly but point is to minimizing use of str "+" operator.
-        return b"".join(
-            chain.from_iterable(chain(row, [b"\r", b"\n"]) for row in screen)
-        ).decode()
+        return render.screen_to_tui(screen)
@@ -0,0 +1,445 @@
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from collections import namedtuple
+
+CLEAR_SCREEN = "\x1b[H\x1b[J"
+HIDE_CURSOR = "\033[?25l"
+SHOW_CURSOR = "\033[?25h"
+
+
+def move_cursor(row, col):
+    """
+    Returns the ANSI sequence moving the cursor to a (0-based) screen cell.
+    """
+    return f"\x1b[{row + 1};{col + 1}H"
+
+
+def changed_cells(previous, current, rows=None):
+    """
+    Returns the row and column indices of the cells that differ.
+
+    Args:
+        previous (np.ndarray): The screen the client currently displays.
+        current (np.ndarray): The screen to display, of the same shape.
+        rows (list): Sorted indices of the only rows that may differ, None
+            to compare every row.
+    """
+    if rows is None:
+        return np.nonzero(previous != current)
+    rows = np.asarray(rows, dtype=np.intp)
+    changed, cols = np.nonzero(previous[rows] != current[rows])
+    return rows[changed], cols
+
+
+def diff_screens(previous, current, offset=(0, 0), rows=None):
+    """
+    Encode the cells that changed between two screens of the same shape.
+
+    Consecutive changed cells on the same row are coalesced into a single
+    cursor move followed by the new characters.
+
+    Args:
+        previous (np.ndarray): The screen the client currently displays.
+        current (np.ndarray): The screen to display.
+        offset ((int, int)): Terminal row and column of the screen's top left cell.
+        rows (list): Sorted indices of the only rows that may have changed,
+            None to compare every row.
+
+    Returns:
+        str: ANSI cursor moves and characters, empty if nothing changed.
+    """
+    return encode_cells(current, *changed_cells(previous, current, rows), offset)
+
+
+def encode_cells(screen, rows, cols, offset=(0, 0)):
+    """
+    Encode some cells of a screen, as returned by `changed_cells`.
+
+    Args:
+        screen (np.ndarray): The screen to display.
+        rows (np.ndarray): Row indices of the cells, in row-major order.
+        cols (np.ndarray): Column indices of the cells.
+        offset ((int, int)): Terminal row and column of the screen's top left cell.
+
+    Returns:
+        str: ANSI cursor moves and characters.
+    """
+    if len(rows) == 0:
+        return ""
+    top, left = offset
+
+    parts = []
+    run_row = run_start = run_end = None
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        if row == run_row and col == run_end:
+            run_end += 1
+            continue
+        if run_row is not None:
+            parts.append(move_cursor(top + run_row, left + run_start))
+            parts.append(screen[run_row, run_start:run_end].tobytes().decode())
+        run_row, run_start, run_end = row, col, col + 1
+    parts.append(move_cursor(top + run_row, left + run_start))
+    parts.append(screen[run_row, run_start:run_end].tobytes().decode())
+    return "".join(parts)
+
+
+# Fraction of changed cells above which a full redraw is cheaper.
+FULL_REDRAW_RATIO = 0.5
+
+
+class Frame(namedtuple("Frame", ["tick", "screen", "delta", "views"])):
+    """
+    A game frame, encoded once per tick and shared by every viewer.
+
+    screen is a read-only snapshot and delta the changes since the previous
+    tick's frame (None if a full redraw is needed). views caches the full
+    redraw and the encodings for terminals of other sizes, see `Viewport`.
+    """
+
+    __slots__ = ()
+
+    @property
+    def data(self):
+        """The full redraw, only encoded once a viewer needs it."""
+        data = self.views.get(None)
+        if data is None:
+            data = b"".join(
+                [
+                    CLEAR_SCREEN.encode(),
+                    screen_to_bytes(self.screen),
+                    HIDE_CURSOR.encode(),
+                ]
+            )
+            self.views[None] = data
+        return data
+
+
+def encode_delta(previous, current, offset=(0, 0), rows=None):
+    """
+    Encode the changes between two screens.
+
+    Args:
+        previous (np.ndarray): The screen the client currently displays.
+        current (np.ndarray): The screen to display.
+        offset ((int, int)): Terminal row and column of the screen's top left cell.
+        rows (list): Sorted indices of the only rows that may have changed,
+            None to compare every row.
+
+    Returns:
+        bytes or None: The changes, None if the shape changed or most of
+        the screen changed anyway and a full redraw is cheaper.
+    """
+    if previous.shape != current.shape:
+        return None
+    changed, cols = changed_cells(previous, current, rows)
+    if len(changed) > current.size * FULL_REDRAW_RATIO:
+        return None
+    return encode_cells(current, changed, cols, offset).encode()
+
+
+def encode_frame(tick, screen, previous=None, rows=None):
+    """
+    Snapshot a screen and encode its changes.
+
+    The full redraw is only encoded on demand, see `Frame.data`.
+
+    Args:
+        tick (int): The tick the screen belongs to.
+        screen (np.ndarray): The screen to encode.
+        previous (Frame): The frame of the previous tick, if any.
+        rows (list): Sorted indices of the only rows that may have changed
+            since previous, None to compare every row.
+
+    Returns:
+        Frame: The encoded frame.
+    """
+    # Snapshot, the game keeps mutating its screen from other threads.
+    screen = copy_screen(screen)
+    screen.flags.writeable = False
+    delta = (
+        encode_delta(previous.screen, screen, rows=rows)
+        if previous is not None
+        else None
+    )
+    return Frame(tick, screen, delta, {})
+
+
+class Viewport(namedtuple("Viewport", ["top", "left", "rows", "cols"])):
+    """
+    Where a screen goes in a terminal of another size.
+
+    The screen is centered in a larger terminal, and its middle is shown in
+    a smaller one: rows and cols are the slices of the screen displayed,
+    top and left the terminal cell its first displayed cell goes to. Every
+    row is positioned explicitly, so nothing is ever written past the edge
+    of the terminal, where it would wrap or scroll.
+    """
+
+    @classmethod
+    def fit(cls, shape, size):
+        """
+        Args:
+            shape ((int, int)): Rows and columns of the screen.
+            size ((int, int)): Rows and columns of the terminal.
+
+        Returns:
+            Viewport: The placement of the screen.
+        """
+        placement = []
+        for length, available in zip(shape, size):
+            start = max(0, (length - available) // 2)
+            shown = slice(start, start + min(length, available))
+            placement.append((max(0, (available - length) // 2), shown))
+        (top, rows), (left, cols) = placement
+        return cls(top, left, rows, cols)
+
+    def crop(self, screen):
+        """Returns the part of screen that is displayed."""
+        return screen[self.rows, self.cols]
+
+    def encode(self, screen):
+        """Encodes a full redraw of screen."""
+        parts = [CLEAR_SCREEN]
+        for i, row in enumerate(self.crop(screen)):
+            parts.append(move_cursor(self.top + i, self.left))
+            parts.append(row.tobytes().decode())
+        parts.append(HIDE_CURSOR)
+        return "".join(parts).encode()
+
+    def encode_delta(self, previous, current):
+        """Encodes the displayed changes between two screens, as `encode_delta`."""
+        if previous.shape != current.shape:
+            return None
+        return encode_delta(
+            self.crop(previous), self.crop(current), (self.top, self.left)
+        )
+
+
+def render_view(frame, size, previous=None):
+    """
+    Encodes a frame for a terminal of the given size.
+
+    Encodings are cached on the frame per size, so viewers with the same
+    terminal size share them, as viewers of the default size share
+    `Frame.data` and `Frame.delta`.
+
+    Args:
+        frame (Frame): The frame to encode.
+        size ((int, int)): Rows and columns of the terminal.
+        previous (Frame): The frame the client displays, None for a full redraw.
+
+    Returns:
+        bytes: The output, a full redraw if no delta could be encoded.
+    """
+    if previous is not None:
+        # Deltas from the previous tick are the same for every viewer.
+        shared = frame.tick == previous.tick + 1
+        key = (size, "delta")
+        if shared and key in frame.views:
+            delta = frame.views[key]
+        else:
+            viewport = Viewport.fit(frame.screen.shape, size)
+            delta = viewport.encode_delta(previous.screen, frame.screen)
+            if shared:
+                frame.views[key] = delta
+        if delta is not None:
+            return delta
+    data = frame.views.get(size)
+    if data is None:
+        data = Viewport.fit(frame.screen.shape, size).encode(frame.screen)
+        frame.views[size] = data
+    return data
+
+
+class DeltaRenderer:
+    """
+    Keeps the last frame sent to a client and picks what to send next.
+
+    Clients that received the previous tick get the shared delta of the new
+    frame. A full redraw is sent for the first frame, whenever the screen
+    shape changes (e.g. switching between the board and a score screen),
+    after `reset` and when most of the screen changed anyway. Clients that
+    skipped ticks get a delta computed against their own last frame.
+
+    Once the client's terminal size is known, frames are fitted to it with
+    `render_view`.
+    """
+
+    def __init__(self):
+        self.last = None
+        # Rows and columns of the client's terminal, None if unknown.
+        self.size = None
+
+    def reset(self):
+        """Forces the next frame to be a full redraw (e.g. after a resize)."""
+        self.last = None
+
+    def resize(self, size):
+        """
+        Sets the size of the client's terminal.
+
+        Args:
+            size ((int, int)): Rows and columns, None if unknown.
+        """
+        if size != self.size:
+            self.size = size
+            self.reset()
+
+    def render(self, frame):
+        """
+        Returns the output needed to bring the client up to date with frame.
+
+        Args:
+            frame (Frame): The frame to display.
+
+        Returns:
+            bytes: The data to send, empty if the client is already up to date.
+        """
+        last = self.last
+        if last is not None and frame.tick == last.tick:
+            return b""
+        self.last = frame
+        if self.size is not None:
+            return render_view(frame, self.size, last)
+        if last is None:
+            return frame.data
+        if frame.tick == last.tick + 1:
+            delta = frame.delta
+        else:
+            delta = encode_delta(last.screen, frame.screen)
+        return frame.data if delta is None else delta
+
+
+class FrameBroadcaster:
+    """
+    Shares the frames of one game with every viewer, players and spectators.
+
+    Frames are encoded once by the game's tick. Viewers wait for a frame newer
+    than the last one they saw and always get the latest, so a viewer that
+    falls behind skips frames instead of queueing them, and never slows down
+    the tick or the other viewers.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.closed = False
+        # Everyone watching, and the spectators among them.
+        self.viewers = 0
+        self.spectators = 0
+        self.condition = threading.Condition()
+
+    def publish(self, frame):
+        """Makes frame the latest frame and wakes up every viewer."""
+        with self.condition:
+            self.frame = frame
+            self.condition.notify_all()
+
+    def close(self):
+        """Wakes up every viewer for good, e.g. once the game is over."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def wait(self, tick=-1, timeout=None):
+        """
+        Waits for a frame newer than tick, or for the broadcast to end.
+
+        Args:
+            tick (int): The tick of the last frame the caller has seen.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            Frame or None: The latest frame, None if there is none yet.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: (self.frame is not None and self.frame.tick > tick)
+                or self.closed,
+                timeout,
+            )
+            return self.frame
+
+    @contextmanager
+    def watch(self, spectator=True):
+        """
+        Counts the caller as a viewer for the duration of the block.
+
+        Args:
+            spectator (bool): False for a player of the game.
+        """
+        with self.condition:
+            self.viewers += 1
+            self.spectators += spectator
+        try:
+            yield self
+        finally:
+            with self.condition:
+                self.viewers -= 1
+                self.spectators -= spectator
+
+
+def new_screen(rows, cols, fill=b" "):
+    """
+    Allocate a screen whose rows are followed by a permanent CRLF.
+
+    The screen is a (rows, cols) view of a (rows, cols + 2) buffer whose last
+    two columns hold b"\r\n", so the whole TUI representation is a single
+    `tobytes()` of the buffer.
+    """
+    buffer = np.full((rows, cols + 2), fill, dtype="S1")
+    buffer[:, -2] = b"\r"
+    buffer[:, -1] = b"\n"
+    return buffer[:, :cols]
+
+
+def get_crlf_buffer(screen):
+    """
+    Returns the CRLF-terminated buffer screen is a full view of, None otherwise.
+    """
+    buffer = screen.base if isinstance(screen, np.ndarray) else None
+    if (
+        buffer is not None
+        and buffer.shape == (screen.shape[0], screen.shape[1] + 2)
+        and buffer.dtype == screen.dtype
+        and buffer.flags.c_contiguous
+        and screen.ctypes.data == buffer.ctypes.data
+    ):
+        return buffer
+    return None
+
+
+def copy_screen(screen):
+    """
+    Copy a screen into a new CRLF-terminated buffer.
+    """
+    buffer = get_crlf_buffer(screen)
+    if buffer is not None:
+        return buffer.copy()[:, :-2]
+    screen = np.atleast_2d(np.asarray(screen, dtype="S1"))
+    copy = new_screen(*screen.shape)
+    copy[:] = screen
+    return copy
+
+
+def screen_to_bytes(screen):
+    """
+    Convert a screen to its encoded TUI representation.
+    :param screen: The screen to convert
+    :return: The rows of the screen, each terminated by CRLF
+    """
+    buffer = get_crlf_buffer(screen)
+    if buffer is None:
+        buffer = get_crlf_buffer(copy_screen(screen))
+    return buffer.tobytes()
+
+
+def screen_to_tui(screen):
+    """
+    Convert a screen to a TUI representation
+    :param screen: The screen to convert
+    :return: The TUI representation of the screen
+    """
+    return screen_to_bytes(screen).decode()
@@ -1,11 +1,122 @@
 """
 - Import things from your .base module
 """
+import argparse
 import time
 from lanpong.server.server import Server
+from lanpong.server.admission import AdmissionControl
+from lanpong.server.credentials import CredentialVerifier
+from lanpong.server.db import DB
+from lanpong.server.output import FramePacer
+from lanpong.server.ssh import CIPHER_PREFERENCE, DEFAULT_HOST_KEY_FILES, KEX_PREFERENCE
 from lanpong.game.game import Game
 
 
 def main():
-    server = Server()
+    parser = argparse.ArgumentParser(prog="lanpong")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Serve every connection from a single asyncio event loop.",
+    )
+    parser.add_argument(
+        "--db",
+        choices=["json", "sqlite"],
+        default="json",
+        help="User storage backend. sqlite imports users.json on first start.",
+    )
+    parser.add_argument(
+        "--rating-window",
+        type=int,
+        default=None,
+        help="Pair players whose scores differ by at most this much, widening "
+        "while they wait. Players are paired in arrival order by default.",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=AdmissionControl.MAX_CONNECTIONS,
+        help="Connections served at once, further clients are turned away.",
+    )
+    parser.add_argument(
+        "--max-handshakes",
+        type=int,
+        default=AdmissionControl.MAX_HANDSHAKES,
+        help="SSH handshakes run at once, further clients wait for a slot.",
+    )
+    parser.add_argument(
+        "--connection-rate",
+        type=float,
+        default=AdmissionControl.RATE,
+        help="New connections per second allowed from a single IP address.",
+    )
+    parser.add_argument(
+        "--host-key",
+        dest="host_keys",
+        action="append",
+        help="Host private key file, may be repeated. Defaults to "
+        f"{' and '.join(DEFAULT_HOST_KEY_FILES)}, whichever exist.",
+    )
+    parser.add_argument(
+        "--kex",
+        type=lambda value: value.split(","),
+        default=KEX_PREFERENCE,
+        help="Comma-separated key exchange algorithms, most preferred first.",
+    )
+    parser.add_argument(
+        "--ciphers",
+        type=lambda value: value.split(","),
+        default=CIPHER_PREFERENCE,
+        help="Comma-separated ciphers, most preferred first.",
+    )
+    parser.add_argument(
+        "--password-cost",
+        type=int,
+        default=CredentialVerifier.N.bit_length() - 1,
+        help="scrypt cost of password hashes, as a power of 2.",
+    )
+    parser.add_argument(
+        "--min-fps",
+        type=float,
+        default=FramePacer.MIN_FPS,
+        help="Lowest frame rate sent to a client on a slow link.",
+    )
+    parser.add_argument(
+        "--max-fps",
+        type=float,
+        default=FramePacer.MAX_FPS,
+        help="Highest frame rate sent to a client on a fast link.",
+    )
+    args = parser.parse_args()
+    admission = AdmissionControl(
+        max_connections=args.max_connections,
+        max_handshakes=args.max_handshakes,
+        rate=args.connection_rate,
+    )
+
+    if args.db == "sqlite":
+        from lanpong.server.sqlite_db import SQLiteDB
+
+        db = SQLiteDB()
+    else:
+        db = DB()
+
+    if args.use_async:
+        from lanpong.server.async_server import AsyncServer
+
+        server_class = AsyncServer
+    else:
+        server_class = Server
+    server = server_class(
+        credentials=CredentialVerifier(db, n=2**args.password_cost),
+        key_file_name=args.host_keys or DEFAULT_HOST_KEY_FILES,
+        db=db,
+        rating_window=args.rating_window,
+        admission=admission,
+        kex=args.kex,
+        ciphers=args.ciphers,
+        min_fps=args.min_fps,
+        max_fps=args.max_fps,
+    )
     server.start_server()
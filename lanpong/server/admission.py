@@ -0,0 +1,186 @@
+import threading
+import time
+
+# Decisions of `AdmissionControl.admit`.
+ADMIT = "admit"
+# Over capacity, the client is told so through the SSH banner.
+REJECT = "reject"
+# Rate limited or far over capacity, the socket is closed right away.
+DROP = "drop"
+
+CAPACITY_BANNER = "LAN PONG is full right now, please try again in a minute.\r\n"
+
+
+class TokenBucket:
+    """
+    Allows `rate` events per second, with bursts of up to `burst` events.
+    """
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """Returns True and consumes a token if one is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AdmissionControl:
+    """
+    Decides which incoming connections get served, before any SSH work.
+
+    Limits the connections served at once, the SSH handshakes (key exchange
+    and authentication) running at once, and how often each IP address may
+    connect. Connections over capacity get a short rejection banner, as long
+    as only a few rejections are in flight; everything else is dropped
+    without a handshake, so a connection storm costs little more than an
+    accept and a close.
+    """
+
+    MAX_CONNECTIONS = 1000
+    MAX_HANDSHAKES = 32
+    # Seconds a connection may wait for a handshake slot.
+    HANDSHAKE_TIMEOUT = 10
+    # Rejection banners being sent at once, beyond that connections are dropped.
+    MAX_REJECTIONS = 8
+    # New connections per second and burst allowed from a single IP address.
+    RATE = 1
+    BURST = 5
+    # Number of IP addresses tracked before idle ones are forgotten.
+    MAX_TRACKED_ADDRESSES = 10000
+
+    def __init__(
+        self,
+        max_connections=MAX_CONNECTIONS,
+        max_handshakes=MAX_HANDSHAKES,
+        rate=RATE,
+        burst=BURST,
+    ):
+        """
+        Initialize the admission control.
+
+        Args:
+            max_connections (int): Connections served at once.
+            max_handshakes (int): SSH handshakes running at once.
+            rate (float): New connections per second allowed from one IP address.
+            burst (int): New connections allowed at once from one IP address.
+        """
+        self.max_connections = max_connections
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self._handshakes = threading.BoundedSemaphore(max_handshakes)
+        self._buckets = {}
+        self.connections = 0
+        self.rejecting = 0
+        self.handshakes = 0
+        self.handshakes_waiting = 0
+        # Totals since the server started.
+        self.admitted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.handshake_timeouts = 0
+
+    def _allow_address(self, address, now):
+        bucket = self._buckets.get(address)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_TRACKED_ADDRESSES:
+                self._forget_idle(now)
+            bucket = self._buckets[address] = TokenBucket(self.rate, self.burst, now)
+        return bucket.take(now)
+
+    def _forget_idle(self, now):
+        """Forgets the addresses whose bucket is full again."""
+        for address, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[address]
+
+    def admit(self, address):
+        """
+        Decides what to do with a new connection.
+
+        Args:
+            address (str): The IP address of the client.
+
+        Returns:
+            str: ADMIT, REJECT or DROP. `release` must be called once an
+            admitted or rejected connection is closed.
+        """
+        with self.lock:
+            if not self._allow_address(address, time.monotonic()):
+                self.rate_limited += 1
+                self.dropped += 1
+                return DROP
+            if self.connections >= self.max_connections:
+                if self.rejecting >= self.MAX_REJECTIONS:
+                    self.dropped += 1
+                    return DROP
+                self.rejecting += 1
+                self.rejected += 1
+                return REJECT
+            self.connections += 1
+            self.admitted += 1
+            return ADMIT
+
+    def release(self, decision):
+        """Frees the capacity of a connection that was admitted or rejected."""
+        with self.lock:
+            if decision == ADMIT:
+                self.connections -= 1
+            elif decision == REJECT:
+                self.rejecting -= 1
+
+    def begin_handshake(self, timeout=HANDSHAKE_TIMEOUT):
+        """
+        Waits for a handshake slot.
+
+        Returns:
+            bool: True if a slot was taken, `end_handshake` must then be called.
+        """
+        with self.lock:
+            self.handshakes_waiting += 1
+        acquired = self._handshakes.acquire(timeout=timeout)
+        with self.lock:
+            self.handshakes_waiting -= 1
+            if acquired:
+                self.handshakes += 1
+            else:
+                self.handshake_timeouts += 1
+        return acquired
+
+    def end_handshake(self):
+        """Frees a handshake slot."""
+        with self.lock:
+            self.handshakes -= 1
+        self._handshakes.release()
+
+    def get_stats(self):
+        """
+        Returns the admission statistics.
+
+        Returns:
+            dict: Current connections and handshakes, and totals per decision.
+        """
+        with self.lock:
+            return {
+                "connections": self.connections,
+                "handshakes": self.handshakes,
+                "handshakes_waiting": self.handshakes_waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "rate_limited": self.rate_limited,
+                "handshake_timeouts": self.handshake_timeouts,
+            }
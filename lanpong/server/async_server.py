@@ -0,0 +1,383 @@
+import asyncio
+from functools import partial
+from itertools import count
+
+import asyncssh
+import paramiko
+
+from ..game.game import Game
+from ..game.render import CLEAR_SCREEN, HIDE_CURSOR, SHOW_CURSOR
+from lanpong.server.ssh import (
+    SSHServer,
+    find_host_key_files,
+    get_term_size,
+    host_key_rank,
+)
+from lanpong.server.admission import CAPACITY_BANNER, DROP, REJECT
+from lanpong.server.inputs import InputSelector
+from lanpong.server.output import FramePacer, ProcessFrameWriter
+from lanpong.server.ping import Ping, tcp_info_rtt
+from lanpong.server.server import Server, get_waiting_status
+
+
+class AsyncSSHServer(asyncssh.SSHServer):
+    """
+    asyncssh adapter around `SSHServer`, so both server modes share the same
+    authentication rules.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.ssh_server = SSHServer(server)
+        self.allowed_auths = []
+        self.decision = DROP
+
+    @property
+    def user(self):
+        return self.ssh_server.user
+
+    def connection_made(self, conn):
+        self.conn = conn
+        self.decision = self.server.admission.admit(conn.get_extra_info("peername")[0])
+        if self.decision == DROP:
+            conn.abort()
+        elif self.decision == REJECT:
+            self.ssh_server = SSHServer(self.server, reject_banner=CAPACITY_BANNER)
+
+    def connection_lost(self, exc):
+        if self.decision != DROP:
+            self.server.admission.release(self.decision)
+
+    def begin_auth(self, username):
+        banner, lang = self.ssh_server.get_banner()
+        self.conn.send_auth_banner(banner, lang)
+        self.allowed_auths = self.ssh_server.get_allowed_auths(username).split(",")
+        # Always require auth, "none" in allowed_auths means nothing succeeds.
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    async def validate_password(self, username, password):
+        if "password" not in self.allowed_auths or self.ssh_server.reject_banner:
+            return False
+        # Wait for the verifier's pool without blocking the event loop.
+        user = await asyncio.wrap_future(
+            self.server.credentials.login(username, password)
+        )
+        self.ssh_server.user = user
+        return user is not None
+
+    def public_key_auth_supported(self):
+        return True
+
+    def validate_public_key(self, username, key):
+        if "publickey" not in self.allowed_auths:
+            return False
+        try:
+            key = paramiko.PKey.from_type_string(key.get_algorithm(), key.public_data)
+        except Exception:
+            return False
+        return (
+            self.ssh_server.check_auth_publickey(username, key)
+            == paramiko.AUTH_SUCCESSFUL
+        )
+
+
+def send_frame(process, frame):
+    """
+    Sends a frame to the client.
+    """
+    process.stdout.write("".join([CLEAR_SCREEN, frame, HIDE_CURSOR]).encode())
+
+
+async def read_input(process, size):
+    """
+    Reads up to size bytes from the client, empty bytes on EOF.
+    """
+    while True:
+        try:
+            return await process.stdin.read(size)
+        except asyncssh.TerminalSizeChanged:
+            # The new size is picked up with get_process_term_size.
+            continue
+
+
+def get_process_term_size(process):
+    """
+    Returns the (rows, columns) of the client's terminal, None if unknown.
+    """
+    width, height, _, _ = process.get_terminal_size()
+    return get_term_size(width, height)
+
+
+async def read_char(process):
+    """
+    Reads a single character from the client, empty string on EOF.
+    """
+    return (await read_input(process, 1)).decode(errors="replace")
+
+
+async def wait_for_char(process, valid_chars):
+    """
+    Waits for a character from the client that is in the valid_chars set.
+    """
+    while char := await read_char(process):
+        if char in valid_chars:
+            return char
+    raise ConnectionError("Client disconnected")
+
+
+async def echo_line(process):
+    """
+    Reads a line from the client, echoing every typed character.
+    """
+    line = ""
+    while True:
+        char = await read_char(process)
+        if not char:
+            raise ConnectionError("Client disconnected")
+
+        # Handle backspace (ASCII 8 or '\b' or '\x7F')
+        if char in {"\x08", "\b", "\x7F"}:
+            if line:
+                line = line[:-1]
+        elif char == "\r" or char == "\n":
+            break
+        else:
+            line += char
+            process.stdout.write(char.encode())
+    return line
+
+
+class ProcessTerminal:
+    """
+    The client's terminal, over an asyncssh process.
+
+    Counterpart of `ChannelTerminal`, for the lobby and registration flows
+    shared with `Server`.
+    """
+
+    def __init__(self, process):
+        """
+        Initialize the terminal.
+
+        Parameters:
+        - process: The asyncssh SSHServerProcess of the client.
+        """
+        self.process = process
+
+    def send_frame(self, frame):
+        """Clears the terminal and shows frame."""
+        send_frame(self.process, frame)
+
+    async def wait_for_char(self, valid_chars):
+        """Waits for a character in valid_chars."""
+        return await wait_for_char(self.process, valid_chars)
+
+    async def echo_line(self):
+        """Reads a line, echoing every typed character."""
+        return await echo_line(self.process)
+
+    async def sleep(self, seconds):
+        """Suspends the flow for seconds."""
+        await asyncio.sleep(seconds)
+
+    async def result(self, future):
+        """Waits for a concurrent.futures.Future without blocking the loop."""
+        return await asyncio.wrap_future(future)
+
+
+class AsyncServer(Server):
+    """
+    Single event loop variant of `Server`.
+
+    Accept, auth, lobby, matchmaking, input, ping and game ticks all run as
+    coroutines on one asyncio loop instead of several threads per player.
+    """
+
+    TICK_INTERVAL = 0.05
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Same keys, in the same order of preference, as the paramiko server.
+        self.host_keys = sorted(
+            map(asyncssh.read_private_key, find_host_key_files(self.key_file_name)),
+            key=lambda key: host_key_rank(key.get_algorithm()),
+        )
+
+    def start_server(self, host="0.0.0.0", port=2222):
+        """Starts an SSH server on specified port and address
+
+        Args:
+            host (str): Server host addr. Defaults to '0.0.0.0'.
+            port (int): Port. Defaults to 2222.
+        """
+        asyncio.run(self.serve(host, port))
+
+    async def serve(self, host="0.0.0.0", port=2222):
+        """Runs the SSH server until cancelled."""
+        server = await asyncssh.create_server(
+            lambda: AsyncSSHServer(self),
+            host,
+            port,
+            server_host_keys=self.host_keys,
+            kex_algs=self.kex,
+            encryption_algs=self.ciphers,
+            process_factory=self.handle_process,
+            line_editor=False,
+            # Work on bytes so shared frames are written without re-encoding.
+            encoding=None,
+        )
+        print(f"Listening for connection on {host}:{port}")
+        scheduler_task = asyncio.create_task(self.handle_games())
+        try:
+            async with server:
+                await server.wait_closed()
+        finally:
+            scheduler_task.cancel()
+
+    async def handle_games(self):
+        """
+        Ticks the game scheduler on the event loop
+        """
+        while True:
+            await asyncio.sleep(self.scheduler.tick_once())
+
+    async def handle_ping(self, game: Game, ping: Ping, name, player_id):
+        """
+        Handles the ping updates
+        """
+        while game.loser == 0:
+            game.update_network_stats(f"{name}'s PING: {ping.get():.3F}ms", player_id)
+            game.update_network_stats(ping.get_summary(), player_id, line=1)
+            await asyncio.sleep(Ping.INTERVAL)
+
+    async def wait_for_opponent(self, process, game: Game):
+        """
+        Waits until the game is full, updating the waiting screen's status line.
+        """
+        loop = asyncio.get_running_loop()
+        full = asyncio.Event()
+        # The opponent may join from another thread, e.g. a test client.
+        game.when_full(lambda: loop.call_soon_threadsafe(full.set))
+        started = loop.time()
+        for tick in count():
+            try:
+                await asyncio.wait_for(full.wait(), self.WAITING_STATUS_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                pass
+            self.rematch()
+            status = get_waiting_status(
+                self.matchmaker.position(game), loop.time() - started, tick
+            )
+            process.stdout.write(status.encode())
+
+    async def spectate(self, process, game: Game):
+        """
+        Streams a game to a spectator until it ends or the spectator presses q.
+
+        Frames are dropped while earlier output is still waiting to be sent.
+        """
+        stop = asyncio.create_task(wait_for_char(process, {"q"}))
+        writer = ProcessFrameWriter(process)
+        pacer = FramePacer(self.min_fps, self.max_fps)
+        try:
+            with game.broadcaster.watch():
+                while game.loser == 0 and not stop.done():
+                    frame = game.frame
+                    if frame is not None:
+                        writer.resize(get_process_term_size(process))
+                        writer.write(frame)
+                    pacer.update(writer)
+                    await asyncio.sleep(pacer.delay())
+            if stop.done():
+                # Raises if the client disconnected.
+                stop.result()
+        finally:
+            stop.cancel()
+
+    async def handle_input(self, process, game: Game, player_id):
+        """
+        Queues the keys received from the client for the next game tick.
+        """
+        while data := await read_input(process, InputSelector.READ_SIZE):
+            game.queue_input(player_id, data)
+
+    async def handle_process(self, process):
+        """
+        Handles a client session.
+        """
+        user = process.get_extra_info("connection").get_owner().user
+        with self.lock:
+            self.connections.add(user["username"])
+        tasks = []
+        game = None
+        try:
+            terminal = ProcessTerminal(process)
+
+            # If username is new prompt to register.
+            if user["username"] == "new":
+                await self.register_account(terminal)
+                return
+
+            # Show lobby and match making option screen.
+            await self.lobby(terminal, user, partial(self.spectate, process))
+            game, player_id = self.get_game_or_create(user["username"], user["score"])
+            game.set_player_ready(player_id, True)
+
+            # Show waiting screen until there are two players.
+            if not game.is_full():
+                send_frame(process, self.waiting_screen)
+                await self.wait_for_opponent(process, game)
+                # A rematch may have paired the player into another game.
+                game, player_id = self.matchmaker.follow(game, player_id)
+                game.set_player_ready(player_id, True)
+
+            # Reading TCP_INFO doesn't block, unlike waiting for a keepalive reply.
+            sock = process.get_extra_info("connection").get_extra_info("socket")
+            ping = Ping(partial(tcp_info_rtt, sock))
+            tasks = [
+                asyncio.create_task(self.handle_input(process, game, player_id)),
+                asyncio.create_task(
+                    self.handle_ping(game, ping, user["username"], player_id)
+                ),
+            ]
+
+            # Send each tick's shared frame, only the cells that changed if possible.
+            # Frames the client can't take yet are dropped rather than queued, and
+            # the frame rate follows what the client's link can take.
+            writer = ProcessFrameWriter(process)
+            pacer = FramePacer(self.min_fps, self.max_fps)
+            # Frames are only encoded for games someone watches.
+            with game.broadcaster.watch(spectator=False):
+                while game.loser == 0:
+                    frame = game.frame
+                    if frame is not None:
+                        # Fit frames to the terminal, which may be resized at any time.
+                        writer.resize(get_process_term_size(process))
+                        writer.write(frame)
+                    pacer.update(writer, ping.stats.mean)
+                    await asyncio.sleep(pacer.delay())
+            if writer.frames_dropped:
+                print(
+                    f"{user['username']}: dropped {writer.frames_dropped} of"
+                    f" {writer.frames_sent + writer.frames_dropped} frames"
+                )
+            # Game is over
+            await self.finish_game(terminal, user, game, player_id)
+        except Exception as e:
+            print(f"Exception: {e}")
+        finally:
+            # Clean up.
+            self.leave_game(game)
+            for task in tasks:
+                task.cancel()
+            with self.lock:
+                self.connections.discard(user["username"])
+            try:
+                process.stdout.write(SHOW_CURSOR.encode())
+            except Exception:
+                pass
+            process.exit(0)
@@ -0,0 +1,209 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Prefix of the password fields holding a scrypt hash instead of plaintext.
+SCRYPT_PREFIX = "scrypt"
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+
+def hash_password(password, n, r, p, salt=None):
+    """
+    Hash a password with scrypt.
+
+    Args:
+        password (str): The password to hash.
+        n (int): CPU/memory cost, a power of 2.
+        r (int): Block size.
+        p (int): Parallelization.
+        salt (bytes): Random salt, generated if None.
+
+    Returns:
+        str: "scrypt$n$r$p$salt$hash", salt and hash in base64.
+    """
+    if salt is None:
+        salt = os.urandom(SALT_SIZE)
+    digest = hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r + 1024 * 1024,
+        dklen=HASH_SIZE,
+    )
+    return "$".join(
+        [
+            SCRYPT_PREFIX,
+            str(n),
+            str(r),
+            str(p),
+            base64.b64encode(salt).decode(),
+            base64.b64encode(digest).decode(),
+        ]
+    )
+
+
+def parse_hash(stored):
+    """
+    Split a stored password into its scrypt parameters.
+
+    Returns:
+        (int, int, int, bytes, bytes) or None: n, r, p, salt and hash, None
+        if the password is stored in plaintext.
+    """
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != SCRYPT_PREFIX:
+        return None
+    try:
+        n, r, p = map(int, parts[1:4])
+        return n, r, p, base64.b64decode(parts[4]), base64.b64decode(parts[5])
+    except ValueError:
+        return None
+
+
+def verify_password(password, stored):
+    """
+    Check a password against a stored hash, or a plaintext password.
+
+    Args:
+        password (str): The password to check.
+        stored (str): The password field of the user.
+
+    Returns:
+        bool: True if the password matches.
+    """
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode())
+    n, r, p, salt, _ = parsed
+    return hmac.compare_digest(hash_password(password, n, r, p, salt), stored)
+
+
+class CredentialVerifier:
+    """
+    Checks passwords on a bounded pool of worker threads.
+
+    Key derivation is deliberately slow, so it never runs under the DB lock
+    or on the thread of the caller: lookups hold the DB lock only as long as
+    a dictionary access, and the scrypt work is done by at most `workers`
+    threads. Logins beyond `max_pending` queued checks fail right away
+    instead of piling up.
+
+    Plaintext passwords, and hashes made with other cost parameters, are
+    rehashed on the next successful login.
+    """
+
+    # scrypt cost, about 16 MiB and a few tens of milliseconds per check.
+    N = 2**14
+    R = 8
+    P = 1
+    MAX_PENDING = 256
+
+    def __init__(self, db, n=N, r=R, p=P, workers=None, max_pending=MAX_PENDING):
+        """
+        Initialize the verifier.
+
+        Args:
+            db: Any object implementing the DB interface.
+            n (int): scrypt CPU/memory cost, a power of 2.
+            r (int): scrypt block size.
+            p (int): scrypt parallelization.
+            workers (int): Threads running key derivations, defaults to the CPU count.
+            max_pending (int): Logins queued or running at once.
+        """
+        self.db = db
+        self.n, self.r, self.p = n, r, p
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            thread_name_prefix="credentials",
+        )
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.failures = 0
+        self.overloaded = 0
+        self.rehashed = 0
+
+    def hash(self, password):
+        """Hash a password with the current cost parameters."""
+        return hash_password(password, self.n, self.r, self.p)
+
+    def needs_rehash(self, stored):
+        """True if the stored password isn't hashed with the current cost."""
+        parsed = parse_hash(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+    def _login(self, username, password):
+        try:
+            user = self.db.get_user(username)
+            if user is None or not verify_password(password, user["password"]):
+                with self.lock:
+                    self.failures += 1
+                return None
+            if self.needs_rehash(user["password"]):
+                hashed = self.hash(password)
+                self.db.update_user(user["id"], {"password": hashed})
+                user = dict(user, password=hashed)
+                with self.lock:
+                    self.rehashed += 1
+            with self.lock:
+                self.logins += 1
+            return user
+        finally:
+            self._pending.release()
+
+    def login(self, username, password):
+        """
+        Authenticate a user on the worker pool.
+
+        Args:
+            username (str): The username to authenticate.
+            password (str): The password to authenticate.
+
+        Returns:
+            Future: Resolves to the user if authentication succeeded, None
+            otherwise (also when too many logins are pending).
+        """
+        if not self._pending.acquire(blocking=False):
+            with self.lock:
+                self.overloaded += 1
+            future = Future()
+            future.set_result(None)
+            return future
+        return self.executor.submit(self._login, username, password)
+
+    def create_user(self, username, password, score=0):
+        """
+        Create a user with a hashed password, on the worker pool.
+
+        Returns:
+            Future: Resolves once the user is created, raises like `DB.create_user`.
+        """
+        return self.executor.submit(
+            lambda: self.db.create_user(username, self.hash(password), score)
+        )
+
+    def close(self):
+        """Wait for the pending checks and stop the workers."""
+        self.executor.shutdown()
+
+    def get_stats(self):
+        """
+        Returns the verification statistics.
+
+        Returns:
+            dict: Successful and failed logins, logins refused while
+            overloaded, and passwords rehashed.
+        """
+        with self.lock:
+            return {
+                "logins": self.logins,
+                "failures": self.failures,
+                "overloaded": self.overloaded,
+                "rehashed": self.rehashed,
+            }
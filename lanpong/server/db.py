@@ -4,8 +4,26 @@ from pathlib import Path
 import os
 import re
 
+from lanpong.server.credentials import verify_password
+from lanpong.server.leaderboard import Leaderboard
+
 
 class DB:
+    """
+    JSON user store with in-memory indexes and a write-ahead append log.
+
+    Users are indexed by username and id, so lookups are O(1). Changes are
+    appended to `<filename>.log` as JSON lines, written in groups by a
+    background thread every FLUSH_INTERVAL seconds. Once the log holds
+    COMPACT_THRESHOLD records it is folded into the JSON snapshot, which is
+    replaced atomically.
+    """
+
+    # Seconds between two group flushes of the append log.
+    FLUSH_INTERVAL = 0.2
+    # Number of log records after which the snapshot is rewritten.
+    COMPACT_THRESHOLD = 1000
+
     def __init__(self, filename="users.json"):
         """
         Initialize the DB object.
@@ -18,26 +36,147 @@ class DB:
         self.path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), self.filename
         )
+        self.log_path = self.path + ".log"
+        # Held while writing to the log or rewriting the snapshot.
+        self.log_lock = threading.Lock()
+        self._pending = []
+        self._log_records = 0
+        self._by_name = {}
+        self._by_id = {}
+        self._next_id = 1
+        self.leaderboard = Leaderboard()
         self.users = self.load_db()
 
+        self._flush_event = threading.Event()
+        self._closed = False
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+
     def load_db(self):
         """
-        Load the user data from the JSON file.
+        Load the user data from the JSON snapshot and replay the append log.
 
         Returns:
             list: List of user objects.
         """
-        if not Path(self.path).is_file():
-            return []
-        with open(self.path, "r") as file:
-            return json.load(file)
+        users = []
+        if Path(self.path).is_file():
+            with open(self.path, "r") as file:
+                users = json.load(file)
+        self._by_name = {}
+        self._by_id = {}
+        self.leaderboard = Leaderboard()
+        for user in users:
+            self._index(user)
+
+        if Path(self.log_path).is_file():
+            with open(self.log_path, "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write of the last group, stop replaying.
+                        break
+                    self._apply(record, users)
+                    self._log_records += 1
+        return users
+
+    def _apply(self, record, users):
+        """
+        Apply a log record. Replaying a record twice has no further effect.
+        """
+        if record["op"] == "create":
+            user = record["user"]
+            existing = self._by_id.get(user["id"])
+            if existing is None:
+                users.append(user)
+                self._index(user)
+            else:
+                self._update(existing, user)
+        elif record["op"] == "update":
+            user = self._by_id.get(record["id"])
+            if user is not None:
+                self._update(user, record["data"])
+
+    def _index(self, user):
+        self._by_name[user["username"]] = user
+        self._by_id[user["id"]] = user
+        self._next_id = max(self._next_id, user["id"] + 1)
+        self.leaderboard.update(user["id"], user.get("score", 0))
+
+    def _update(self, user, new_data):
+        if "username" in new_data:
+            self._by_name.pop(user["username"], None)
+        user.update(new_data)
+        self._index(user)
+
+    def _append_log(self, record):
+        """
+        Queue a record for the next group flush. Must hold self.lock.
+        """
+        self._pending.append(json.dumps(record) + "\n")
+
+    def _write_pending(self):
+        """
+        Write the queued records to the log. Must hold self.log_lock.
+        """
+        with self.lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            with open(self.log_path, "a") as file:
+                file.write("".join(pending))
+                file.flush()
+                os.fsync(file.fileno())
+            self._log_records += len(pending)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._flush_event.wait(self.FLUSH_INTERVAL)
+            self._flush_event.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Write the queued changes to disk, compacting the log if it grew large.
+        """
+        with self.log_lock:
+            self._write_pending()
+            if self._log_records >= self.COMPACT_THRESHOLD:
+                self._compact()
+
+    def close(self):
+        """
+        Stop the background flusher and write every queued change.
+        """
+        self._closed = True
+        self._flush_event.set()
+        self._flush_thread.join()
+        self.flush()
+
+    def _compact(self):
+        """
+        Rewrite the snapshot and truncate the log. Must hold self.log_lock.
+        """
+        with self.lock:
+            data = json.dumps(self.users, indent=2)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        # Records queued since the snapshot are written after the truncation,
+        # replaying them again is harmless.
+        open(self.log_path, "w").close()
+        self._log_records = 0
 
     def save_db(self):
         """
         Save the user data to the JSON file.
         """
-        with open(self.path, "w") as file:
-            json.dump(self.users, file, indent=2)
+        with self.log_lock:
+            self._write_pending()
+            self._compact()
 
     def is_username_valid(self, username):
         """
@@ -52,10 +191,7 @@ class DB:
         if username == "" or re.search(r"\s", username):
             return False
 
-        for user in self.users:
-            if user["username"] == username:
-                return False
-        return True
+        return username not in self._by_name
 
     def create_user(self, username, password, score=0):
         """
@@ -77,14 +213,15 @@ class DB:
                 raise ValueError("Username already exists.")
 
             new_user = {
-                "id": len(self.users) + 1,
+                "id": self._next_id,
                 "username": username,
                 "password": password,
                 "score": score,
             }
 
             self.users.append(new_user)
-            self.save_db()
+            self._index(new_user)
+            self._append_log({"op": "create", "user": new_user})
 
     def update_user(self, user_id, new_data):
         """
@@ -98,11 +235,10 @@ class DB:
             ValueError: If the user with the specified ID is not found.
         """
         with self.lock:
-            for user in self.users:
-                if user["id"] == user_id:
-                    for key, value in new_data.items():
-                        user[key] = value
-                    self.save_db()
+            user = self._by_id.get(user_id)
+            if user is not None:
+                self._update(user, new_data)
+                self._append_log({"op": "update", "id": user_id, "data": new_data})
 
     def login(self, username, password):
         """
@@ -116,9 +252,10 @@ class DB:
             dict: User information if authentication is successful, None otherwise.
         """
         with self.lock:
-            for user in self.users:
-                if user["username"] == username and user["password"] == password:
-                    return user
+            user = self._by_name.get(username)
+        # Hashes are checked outside the lock, see CredentialVerifier.
+        if user is not None and verify_password(password, user["password"]):
+            return user
         return None
 
     def get_user(self, username):
@@ -132,10 +269,7 @@ class DB:
             dict or None: The user information if a user with the given username exists, None otherwise.
         """
         with self.lock:
-            for user in self.users:
-                if user["username"] == username:
-                    return user
-        return None
+            return self._by_name.get(username)
 
     def get_top_users(self, num):
         """
@@ -148,7 +282,30 @@ class DB:
             list: A list of the top users.
         """
         with self.lock:
-            return sorted(self.users, key=lambda x: x["score"], reverse=True)[:num]
+            return [self._by_id[user_id] for user_id in self.leaderboard.top(num)]
+
+    def get_leaderboard_version(self):
+        """
+        Get a counter incremented whenever the leaderboard changes.
+
+        Returns:
+            int: The leaderboard version.
+        """
+        return self.leaderboard.version
+
+    def get_rank(self, username):
+        """
+        Get the leaderboard position of a user.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            int or None: The 1-based rank, None if the user does not exist.
+        """
+        with self.lock:
+            user = self._by_name.get(username)
+            return self.leaderboard.rank(user["id"]) if user is not None else None
 
 
 """
@@ -0,0 +1,138 @@
+import logging
+import selectors
+import socket
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class InputSelector:
+    """
+    Reads the keystrokes of every player from a single thread.
+
+    Channels are watched with a selector, so idle players cost nothing and a
+    keystroke is handled as soon as it arrives. Every pending byte is drained
+    in one read and handed to the channel's callback. A channel that fails
+    or a callback that raises is logged, and never stops the thread from
+    serving everyone else.
+    """
+
+    READ_SIZE = 1024
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        # Selectors are not thread-safe, (un)registrations are queued and
+        # applied by the selector thread, which is woken through this pair.
+        self._changes = []
+        self._changes_lock = threading.Lock()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self.selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        self._running = False
+        self._thread = None
+
+    def _queue(self, channel, callback):
+        applied = threading.Event()
+        with self._changes_lock:
+            self._changes.append((channel, callback, applied))
+        self._wakeup_writer.send(b"\0")
+        return applied
+
+    def register(self, channel, callback):
+        """
+        Starts watching a channel.
+
+        Parameters:
+        - channel: The paramiko Channel (or any object with fileno and recv).
+        - callback: Called with the bytes read each time input arrives.
+
+        Returns:
+        - A threading.Event set once the selector thread applied the change.
+        """
+        return self._queue(channel, callback)
+
+    def unregister(self, channel):
+        """
+        Stops watching a channel.
+
+        Returns:
+        - A threading.Event set once the selector thread applied the change,
+          i.e. no more input of the channel goes to its callback.
+        """
+        return self._queue(channel, None)
+
+    def _apply_changes(self):
+        try:
+            while self._wakeup_reader.recv(self.READ_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+        with self._changes_lock:
+            changes, self._changes = self._changes, []
+        for channel, callback, applied in changes:
+            try:
+                if callback is None:
+                    self.selector.unregister(channel)
+                elif channel in self.selector.get_map():
+                    self.selector.modify(channel, selectors.EVENT_READ, callback)
+                else:
+                    self.selector.register(channel, selectors.EVENT_READ, callback)
+            except (KeyError, ValueError, OSError):
+                # Already unregistered, or the channel was closed meanwhile.
+                pass
+            applied.set()
+
+    def _discard(self, channel):
+        try:
+            self.selector.unregister(channel)
+        except (KeyError, ValueError):
+            # Unregistered by its session already.
+            pass
+
+    def _read(self, channel, callback):
+        try:
+            data = channel.recv(self.READ_SIZE)
+            while data and channel.recv_ready():
+                data += channel.recv(self.READ_SIZE)
+        except OSError:
+            logger.exception("Reading from %r failed", channel)
+            data = b""
+        if not data:
+            # End of file, the client disconnected.
+            self._discard(channel)
+            return
+        try:
+            callback(data)
+        except Exception:
+            logger.exception("Input callback of %r failed", channel)
+
+    def poll(self, timeout=None):
+        """
+        Waits for input once and dispatches it.
+        """
+        for key, _ in self.selector.select(timeout):
+            if key.fileobj is self._wakeup_reader:
+                self._apply_changes()
+            elif self.selector.get_map().get(key.fileobj) is key:
+                # Not unregistered or modified by a change applied above.
+                self._read(key.fileobj, key.data)
+
+    def run(self):
+        """Dispatches input until `stop` is called."""
+        while self._running:
+            self.poll()
+
+    def start(self):
+        """Starts dispatching input on a background thread."""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background thread."""
+        self._running = False
+        self._wakeup_writer.send(b"\0")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
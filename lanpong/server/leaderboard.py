@@ -0,0 +1,84 @@
+import threading
+
+from sortedcontainers import SortedList
+
+
+class Leaderboard:
+    """
+    Users ordered by score, maintained incrementally.
+
+    Entries are (-score, id) pairs in a SortedList, so updating a score, the
+    top-k and the rank of a user are all O(log n) instead of a full sort.
+    Ties are broken by id, i.e. by registration order.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._entries = SortedList()
+        self._keys = {}
+        # Incremented on every change, lets readers cache what they render.
+        self.version = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, user_id, score):
+        """
+        Add a user or move them to their new score.
+
+        Args:
+            user_id (int): The ID of the user.
+            score (int): The current score of the user.
+        """
+        key = (-score, user_id)
+        with self.lock:
+            old_key = self._keys.get(user_id)
+            if old_key == key:
+                return
+            if old_key is not None:
+                self._entries.remove(old_key)
+            self._entries.add(key)
+            self._keys[user_id] = key
+            self.version += 1
+
+    def remove(self, user_id):
+        """
+        Remove a user from the leaderboard.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        with self.lock:
+            key = self._keys.pop(user_id, None)
+            if key is not None:
+                self._entries.remove(key)
+                self.version += 1
+
+    def top(self, num):
+        """
+        Get the IDs of the best users.
+
+        Args:
+            num (int): The number of users to return.
+
+        Returns:
+            list: IDs of at most num users, best first.
+        """
+        with self.lock:
+            return [user_id for _, user_id in self._entries.islice(0, num)]
+
+    def rank(self, user_id):
+        """
+        Get the position of a user on the leaderboard.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            int or None: The 1-based rank, None if the user is not ranked.
+        """
+        with self.lock:
+            key = self._keys.get(user_id)
+            if key is None:
+                return None
+            return self._entries.index(key) + 1
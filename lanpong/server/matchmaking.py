@@ -0,0 +1,234 @@
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+from sortedcontainers import SortedList
+
+from ..game.game import Game
+from lanpong.server.ping import LatencyStats
+
+# A game with one player waiting for an opponent.
+Ticket = namedtuple("Ticket", ["game", "username", "score", "opened_at"])
+
+
+class Matchmaker:
+    """
+    Pairs players into games.
+
+    A player who finds no opponent opens a game and waits in it. Open games
+    are kept in arrival order, so the next player joins the one that has
+    waited the longest in O(1). With a rating window, a player instead joins
+    the open game whose score is closest to theirs, as long as the difference
+    is within the window. The window widens the longer the waiting player has
+    waited, so nobody waits forever for a perfect match. Players who are
+    already waiting get paired by `rematch` once their windows overlap: the
+    newer player moves into the older player's game.
+
+    Only open games are tracked here. Full games belong to the GameScheduler,
+    which drops them once they are over.
+    """
+
+    # Rating points the window widens by per second of waiting.
+    WINDOW_GROWTH = 1
+
+    def __init__(self, create_game=Game, rating_window=None, window_growth=None):
+        """
+        Initialize an empty queue.
+
+        Args:
+            create_game (callable): Returns a new game, e.g. already scheduled.
+            rating_window (int): Maximum score difference of two players when
+                nobody waited, None to pair players in arrival order.
+            window_growth (float): Rating points the window widens by per second.
+        """
+        self.create_game = create_game
+        self.rating_window = rating_window
+        self.window_growth = (
+            window_growth if window_growth is not None else self.WINDOW_GROWTH
+        )
+        self.lock = threading.Lock()
+        self._tickets = {}
+        self._seq_by_game = {}
+        # Sequence numbers of the open games, i.e. in arrival order.
+        self._arrivals = SortedList()
+        # (score, seq) of the open games, for rating-based pairing.
+        self._by_score = SortedList()
+        self._seq = itertools.count()
+        # Games whose player was moved to another game by rematch, with the
+        # game and player id they were moved to.
+        self._moved = {}
+        self.matches = 0
+        self.cancelled = 0
+        # Time from opening a game to an opponent joining, in milliseconds.
+        self.wait_times = LatencyStats()
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def _oldest(self):
+        """Returns the sequence number of the oldest open game, None if none."""
+        return self._arrivals[0] if self._arrivals else None
+
+    def _window(self, ticket, now):
+        return self.rating_window + self.window_growth * (now - ticket.opened_at)
+
+    def _find(self, score, now):
+        """Returns the sequence number of the best open game, None if none."""
+        oldest = self._oldest()
+        if oldest is None or self.rating_window is None:
+            return oldest
+        # No open game can have a wider window than the oldest one.
+        widest = self._window(self._tickets[oldest], now)
+        best = None
+        for other_score, seq in self._by_score.irange(
+            (score - widest, -1), (score + widest, float("inf"))
+        ):
+            distance = abs(other_score - score)
+            if distance <= self._window(self._tickets[seq], now) and (
+                best is None or distance < best[0]
+            ):
+                best = (distance, seq)
+        return best[1] if best is not None else None
+
+    def _closest(self, seq, now):
+        """Returns the sequence number of the open game closest in score to
+        the given one, within its window, None if none."""
+        ticket = self._tickets[seq]
+        window = self._window(ticket, now)
+        best = None
+        for other_score, other in self._by_score.irange(
+            (ticket.score - window, -1), (ticket.score + window, float("inf"))
+        ):
+            distance = abs(other_score - ticket.score)
+            if other != seq and (best is None or distance < best[0]):
+                best = (distance, other)
+        return best[1] if best is not None else None
+
+    def _remove(self, seq):
+        ticket = self._tickets.pop(seq)
+        del self._seq_by_game[ticket.game]
+        self._by_score.remove((ticket.score, seq))
+        self._arrivals.remove(seq)
+        return ticket
+
+    def join(self, username, score=0):
+        """
+        Puts a player in an open game, or opens a new one.
+
+        Args:
+            username (str): The username of the player.
+            score (int): The score of the player, used with a rating window.
+
+        Returns:
+            (Game, int): Game and player id
+        """
+        with self.lock:
+            now = time.monotonic()
+            seq = self._find(score, now)
+            if seq is not None:
+                ticket = self._remove(seq)
+                self.matches += 1
+                self.wait_times.add((now - ticket.opened_at) * 1000)
+                return ticket.game, ticket.game.initialize_player(username)
+
+            game = self.create_game()
+            player_id = game.initialize_player(username)
+            seq = next(self._seq)
+            self._tickets[seq] = Ticket(game, username, score, now)
+            self._seq_by_game[game] = seq
+            self._arrivals.add(seq)
+            self._by_score.add((score, seq))
+            return game, player_id
+
+    def rematch(self):
+        """
+        Pairs players waiting in open games whose windows widened enough.
+
+        Games are visited in arrival order, so the older of two open games
+        always has the wider window. Its player gets the closest opponent
+        within that window, who is moved into the older game and whose own
+        game is woken up, see `follow`.
+
+        Returns:
+            list: The games that became full.
+        """
+        if self.rating_window is None:
+            # Arrival order pairs every player on join, nobody is left over.
+            return []
+        full = []
+        with self.lock:
+            now = time.monotonic()
+            for seq in list(self._arrivals):
+                if seq not in self._tickets:
+                    continue
+                other = self._closest(seq, now)
+                if other is None:
+                    continue
+                ticket, moving = self._remove(seq), self._remove(other)
+                player_id = ticket.game.initialize_player(moving.username)
+                self._moved[moving.game] = (ticket.game, player_id)
+                moving.game.notify_full()
+                self.matches += 1
+                self.wait_times.add((now - ticket.opened_at) * 1000)
+                full.append(ticket.game)
+        return full
+
+    def follow(self, game, player_id):
+        """
+        Returns where a player was moved to by rematch.
+
+        Args:
+            game (Game): The game the player waited in.
+            player_id (int): The player id in that game.
+
+        Returns:
+            (Game, int): Game and player id, unchanged if the player wasn't moved.
+        """
+        with self.lock:
+            return self._moved.pop(game, (game, player_id))
+
+    def cancel(self, game):
+        """
+        Closes an open game whose player left before an opponent joined.
+
+        Returns:
+            bool: True if the game was open, False if it was matched already.
+        """
+        with self.lock:
+            # The player may have left right after being moved.
+            self._moved.pop(game, None)
+            seq = self._seq_by_game.get(game)
+            if seq is None:
+                return False
+            self._remove(seq)
+            self.cancelled += 1
+            return True
+
+    def position(self, game):
+        """
+        Returns the 1-based position of an open game in arrival order.
+
+        Returns:
+            int or None: The position, None if the game isn't open anymore.
+        """
+        with self.lock:
+            seq = self._seq_by_game.get(game)
+            if seq is None:
+                return None
+            return self._arrivals.index(seq) + 1
+
+    def get_stats(self):
+        """
+        Returns the matchmaking statistics.
+
+        Returns:
+            dict: Open games, matches made, cancelled games and time to match (ms).
+        """
+        return {
+            "queue_depth": len(self._tickets),
+            "matches": self.matches,
+            "cancelled": self.cancelled,
+            "mean_wait_ms": self.wait_times.mean,
+            "p95_wait_ms": self.wait_times.percentile(95),
+        }
@@ -0,0 +1,223 @@
+import select
+import time
+
+from lanpong.game.render import DeltaRenderer
+
+
+class FrameWriter:
+    """
+    Sends the frames of a game to one client without ever blocking on it.
+
+    Only the latest frame is worth sending: a frame that comes in while the
+    client hasn't taken the previous one yet is dropped, and the next frame
+    sent is diffed against the last one the client actually got, so the
+    skipped frames are coalesced into it. A client on a slow link sees the
+    current state a little less often, instead of an ever older backlog.
+
+    paramiko writes to the socket from the calling thread, so nothing is
+    sent unless both the SSH window the client granted is open and the
+    socket's send buffer has room. Once a client stops reading, the rest of
+    the current frame waits for the next call and newer frames are dropped.
+    """
+
+    def __init__(self, channel):
+        """
+        Initialize the writer.
+
+        Parameters:
+        - channel: The paramiko Channel of the client.
+        """
+        self.channel = channel
+        self.renderer = DeltaRenderer()
+        # Part of the last frame the channel didn't accept yet.
+        self._pending = b""
+        # Tick of the last frame sent or dropped.
+        self.tick = -1
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+
+    def flush(self):
+        """
+        Sends as much of the pending output as the channel takes right away.
+
+        Returns:
+        - True if nothing is left to send.
+        """
+        while self._pending:
+            window = self.channel.out_window_size
+            if not self.channel.send_ready() or window <= 0 or not self.writable():
+                return False
+            sent = self.channel.send(self._pending[:window])
+            self._pending = self._pending[sent:]
+            self.bytes_sent += sent
+        return True
+
+    def writable(self):
+        """
+        Returns True if the connection's socket takes more data right away.
+        """
+        sock = self.channel.get_transport().sock
+        return bool(select.select([], [sock], [], 0)[1])
+
+    def write(self, frame):
+        """
+        Sends a frame, or drops it if the client is still behind.
+
+        Parameters:
+        - frame: The Frame to display.
+
+        Returns:
+        - True if the frame was sent (at least partly), False if it was dropped
+          or seen already.
+        """
+        if frame.tick == self.tick:
+            return False
+        self.tick = frame.tick
+        if not self.flush():
+            self.frames_dropped += 1
+            return False
+        self._pending = self.renderer.render(frame)
+        self.frames_sent += 1
+        self.flush()
+        return True
+
+    def resize(self, size):
+        """
+        Fits the next frames to the client's terminal.
+
+        Parameters:
+        - size: Rows and columns of the terminal, None if unknown.
+        """
+        self.renderer.resize(size)
+
+    def get_stats(self):
+        """
+        Returns the output statistics of the session.
+        """
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class ProcessFrameWriter(FrameWriter):
+    """
+    FrameWriter for an asyncssh process.
+
+    asyncssh buffers whatever is written, so frames are dropped as long as
+    the previous output hasn't left the buffer.
+    """
+
+    def __init__(self, process):
+        """
+        Initialize the writer.
+
+        Parameters:
+        - process: The asyncssh SSHServerProcess of the client.
+        """
+        super().__init__(process.channel)
+        self.stdout = process.stdout
+
+    def flush(self):
+        if self.channel.get_write_buffer_size():
+            return False
+        if self._pending:
+            self.stdout.write(self._pending)
+            self.bytes_sent += len(self._pending)
+            self._pending = b""
+        return True
+
+
+class FramePacer:
+    """
+    Chooses how often to send frames to one client.
+
+    Every UPDATE_INTERVAL the rate is adjusted from what the session
+    observed: if the writer had to drop frames, or the round trip time
+    climbed well above the lowest one seen (i.e. data is queueing up on the
+    way), the rate is halved and capped to what the link actually drained.
+    Otherwise it grows by INCREASE, up to max_fps. Sending less often than
+    the game ticks only skips frames, the next frame sent shows the current
+    state.
+    """
+
+    MIN_FPS = 5
+    MAX_FPS = 60
+    # Rate of a new session, the rate the server always used to send at.
+    INITIAL_FPS = 20
+    # Seconds between two rate adjustments.
+    UPDATE_INTERVAL = 1
+    # Frames per second added after an interval without congestion.
+    INCREASE = 5
+    # Factor applied to the rate after an interval with congestion.
+    DECREASE = 0.5
+    # Extra round trip time, in milliseconds, taken as queueing on the link.
+    QUEUE_DELAY_MS = 20
+
+    def __init__(self, min_fps=MIN_FPS, max_fps=MAX_FPS, now=None):
+        """
+        Initialize the pacer.
+
+        Parameters:
+        - min_fps: Lowest frame rate, however bad the link.
+        - max_fps: Highest frame rate, however good the link.
+        - now: Current time.monotonic(), for tests.
+        """
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.fps = min(max(self.INITIAL_FPS, min_fps), max_fps)
+        now = time.monotonic() if now is None else now
+        self._next_frame = now
+        self._updated = now
+        self._counters = (0, 0, 0)
+        # Lowest round trip time seen, in milliseconds.
+        self.base_rtt = None
+        # Bytes per second drained during the last interval.
+        self.throughput = 0.0
+
+    def update(self, writer, rtt=None, now=None):
+        """
+        Adjusts the frame rate, at most once per UPDATE_INTERVAL.
+
+        Parameters:
+        - writer: The FrameWriter of the session.
+        - rtt: Current round trip time in milliseconds, None if unknown.
+        - now: Current time.monotonic(), for tests.
+
+        Returns:
+        - The frame rate.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._updated
+        if elapsed < self.UPDATE_INTERVAL:
+            return self.fps
+        counters = (writer.bytes_sent, writer.frames_sent, writer.frames_dropped)
+        sent, frames, dropped = (a - b for a, b in zip(counters, self._counters))
+        self._counters = counters
+        self._updated = now
+        self.throughput = sent / elapsed
+
+        queueing = False
+        if rtt:
+            self.base_rtt = rtt if self.base_rtt is None else min(self.base_rtt, rtt)
+            queueing = rtt > 2 * self.base_rtt + self.QUEUE_DELAY_MS
+        if dropped or queueing:
+            fps = self.fps * self.DECREASE
+            if sent and frames:
+                # Frames per second the link drained, at the current frame size.
+                fps = min(fps, self.throughput / (sent / frames))
+        else:
+            fps = self.fps + self.INCREASE
+        self.fps = min(max(fps, self.min_fps), self.max_fps)
+        return self.fps
+
+    def delay(self, now=None):
+        """
+        Returns the seconds to wait before sending the next frame.
+        """
+        now = time.monotonic() if now is None else now
+        # Keep a steady cadence, but don't make up for frames sent late.
+        self._next_frame = max(self._next_frame + 1 / self.fps, now)
+        return self._next_frame - now
@@ -1,55 +1,196 @@
-import subprocess
-import re
+import math
+import socket
+import struct
+import time
+
+import numpy as np
+
+# Offset of tcpi_rtt (microseconds) in the Linux `struct tcp_info`.
+TCP_INFO_RTT_OFFSET = 68
+TCP_INFO_SIZE = 104
+
+
+def keepalive_rtt(transport):
+    """
+    Measure the round trip of an SSH keepalive global request.
+
+    Clients answer unknown global requests with a failure message, which is
+    all we need to time a round trip through the existing connection.
+
+    Parameters:
+    - transport: The paramiko Transport of the client.
+
+    Returns:
+    - Round trip time in milliseconds, None if the transport is closed.
+    """
+    start = time.perf_counter()
+    transport.global_request("keepalive@lanpong", wait=True)
+    if not transport.is_active():
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def tcp_info_rtt(sock):
+    """
+    Read the kernel's smoothed round trip time estimate of a TCP socket.
+
+    Parameters:
+    - sock: The client socket.
+
+    Returns:
+    - Round trip time in milliseconds, None if TCP_INFO is unavailable.
+    """
+    if sock is None or not hasattr(socket, "TCP_INFO"):
+        return None
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, TCP_INFO_SIZE)
+    except OSError:
+        return None
+    if len(info) < TCP_INFO_RTT_OFFSET + 4:
+        return None
+    (rtt,) = struct.unpack_from("I", info, TCP_INFO_RTT_OFFSET)
+    return rtt / 1000
+
+
+class LatencyStats:
+    """
+    Rolling latency statistics over the most recent samples.
+
+    Samples live in a fixed-size ring buffer with a running sum, so adding a
+    sample and reading the mean are O(1). Percentiles are computed on demand
+    in a preallocated scratch buffer, nothing is allocated per sample.
+    """
+
+    # Smoothing factor of the jitter estimate (as in RFC 3550).
+    JITTER_GAIN = 1 / 16
+
+    def __init__(self, size=100):
+        """
+        Initialize empty statistics.
+
+        Parameters:
+        - size: Number of most recent samples to keep.
+        """
+        self.samples = np.zeros(size, dtype=np.float64)
+        self._scratch = np.zeros(size, dtype=np.float64)
+        self.count = 0
+        self._index = 0
+        self._sum = 0.0
+        self._last = None
+        self.jitter = 0.0
+        # Probes sent, and probes that got no answer.
+        self.sent = 0
+        self.lost = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, rtt):
+        """
+        Record a round trip time, evicting the oldest sample if full.
+
+        Parameters:
+        - rtt: Round trip time in milliseconds.
+        """
+        self.sent += 1
+        if self.count == len(self.samples):
+            self._sum -= self.samples[self._index]
+        else:
+            self.count += 1
+        self.samples[self._index] = rtt
+        self._sum += rtt
+        self._index = (self._index + 1) % len(self.samples)
+        if self._index == 0:
+            # Drop the rounding error the running sum accumulated.
+            self._sum = float(self.samples[: self.count].sum())
+
+        if self._last is not None:
+            self.jitter += (abs(rtt - self._last) - self.jitter) * self.JITTER_GAIN
+        self._last = rtt
+
+    def add_lost(self):
+        """Record a probe that got no answer."""
+        self.sent += 1
+        self.lost += 1
+
+    @property
+    def mean(self):
+        """Mean of the kept samples, 0 without samples."""
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def loss(self):
+        """Fraction of the probes that got no answer."""
+        return self.lost / self.sent if self.sent else 0.0
+
+    def percentile(self, q):
+        """
+        Nearest-rank percentile of the kept samples.
+
+        Parameters:
+        - q: Percentile, between 0 and 100.
+
+        Returns:
+        - The percentile in milliseconds, 0 without samples.
+        """
+        if not self.count:
+            return 0.0
+        k = min(max(math.ceil(q / 100 * self.count) - 1, 0), self.count - 1)
+        scratch = self._scratch[: self.count]
+        np.copyto(scratch, self.samples[: self.count])
+        scratch.partition(k)
+        return float(scratch[k])
+
 
 class Ping:
-    # Maximum size for the ping result cache
+    # Maximum number of samples kept for the statistics
     MAX_CACHE_SIZE = 100
+    # Seconds between two samples. Each keepalive costs a round trip on the
+    # player's connection, so latency is sampled far less often than frames.
+    INTERVAL = 1
 
-    def __init__(self, ip) -> None:
+    def __init__(self, probe) -> None:
         """
-        Initialize a Ping object with an IP address and an empty cache.
+        Initialize a Ping object with a latency probe and empty statistics.
 
         Parameters:
-        - ip: IP address to ping.
+        - probe: Callable returning a round trip time in milliseconds (or None
+          if no sample could be taken), e.g. `keepalive_rtt` bound to a
+          transport or `tcp_info_rtt` bound to a socket.
         """
-        self._cache = []  # List to store ping results
-        self.ip = ip  # IP address to ping
+        self.stats = LatencyStats(self.MAX_CACHE_SIZE)
+        self.probe = probe
 
     def get(self):
         """
-        Get the average ping time for the specified IP address.
+        Take a latency sample and get the average ping time.
 
         Returns:
-        - Average ping time rounded to 3 decimal places.
+        - Average ping time rounded to 3 decimal places, 0 without samples.
         """
-        self.get_ping(self.ip)
-        average = sum(self._cache) / len(self._cache)
-        return round(average, 3)
+        self.get_ping()
+        return round(self.stats.mean, 3)
 
-    def get_ping(self, ip_address):
+    def get_ping(self):
         """
-        Perform a single ping to the specified IP address and update the cache.
-
-        Parameters:
-        - ip_address: IP address to ping.
+        Take a single latency sample and update the statistics.
         """
-        command = ["ping", "-c", "1", ip_address]
-        process = subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        stdout, stderr = process.communicate()
-
-        if process.returncode == 0:
-            # Regex to extract the time from the output
-            match = re.search(r"time=(\d+\.?\d*)\s*ms", stdout.decode())
-            if match:
-                if len(self._cache) > self.MAX_CACHE_SIZE:
-                    # If the cache exceeds the maximum size, remove the oldest entry
-                    self._cache.pop(0)
-                # Add the ping time to the cache
-                self._cache.append(float(match.group(1)))
+        rtt = self.probe()
+        if rtt is None:
+            self.stats.add_lost()
         else:
-            # Print an error message if the ping was not successful
-            print(f"Error pinging {ip_address}: {stderr}")
-            return None
+            self.stats.add(rtt)
+        return rtt
 
+    def get_summary(self):
+        """
+        Get a compact view of the percentiles, jitter and loss.
+
+        Returns:
+        - String such as "p95 0.2 p99 0.3 jit 0.0 loss 0%".
+        """
+        stats = self.stats
+        return (
+            f"p95 {stats.percentile(95):.1f} p99 {stats.percentile(99):.1f} "
+            f"jit {stats.jitter:.1f} loss {stats.loss:.0%}"
+        )
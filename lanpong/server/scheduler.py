@@ -0,0 +1,141 @@
+import threading
+import time
+
+from ..game.game import Game
+
+
+class GameScheduler:
+    """
+    Owns every active game and advances them all on a fixed-timestep clock.
+
+    Ticks are scheduled against absolute deadlines so sleep inaccuracy and
+    update time don't accumulate into drift. A tick that starts more than a
+    full interval late resynchronizes the clock instead of bursting through
+    the missed ticks.
+
+    The balls of all games sharing the scheduler's PhysicsEngine are advanced
+    with a single vectorized `PhysicsEngine.step` per tick.
+    """
+
+    TICK_INTERVAL = 0.05
+    # Smoothing factor of the jitter estimate (as in RFC 3550).
+    JITTER_GAIN = 1 / 16
+
+    def __init__(self, tick_interval=TICK_INTERVAL, engine=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            tick_interval (float): Seconds between two game ticks.
+            engine (PhysicsEngine): The engine to step, defaults to Game.engine.
+        """
+        self.tick_interval = tick_interval
+        self.engine = engine if engine is not None else Game.engine
+        # Replaced rather than mutated, so a tick can iterate over it unlocked.
+        self.games = []
+        self.lock = threading.Lock()
+        self.tick = 0
+        # Smoothed and worst absolute deviation from the tick deadline, in seconds.
+        self.jitter = 0.0
+        self.max_jitter = 0.0
+        # Number of ticks that finished after the next deadline had passed.
+        self.overruns = 0
+        self._next_tick = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, game):
+        """Schedules a game. It is advanced once its players are ready."""
+        with self.lock:
+            self.games = self.games + [game]
+
+    def remove(self, game):
+        """Stops scheduling a game."""
+        with self.lock:
+            self.games = [g for g in self.games if g is not game]
+
+    def __len__(self):
+        return len(self.games)
+
+    def step(self):
+        """
+        Advances every started game by one tick, publishes its frame and drops
+        finished games.
+        """
+        with self.lock:
+            games = self.games
+        slots, scores = self.engine.step(time.time())
+        stepped = dict(zip(slots.tolist(), scores.tolist()))
+        finished = set()
+        for game in games:
+            if game.engine is self.engine:
+                if game.slot in stepped:
+                    game.apply_step(stepped[game.slot])
+            elif game.is_game_started_event.is_set() and game.loser == 0:
+                game.update_game()
+            if game.is_game_started_event.is_set():
+                game.publish_frame()
+            if game.loser != 0:
+                finished.add(game)
+        for game in finished:
+            # Wake up everyone still waiting for a frame.
+            game.broadcaster.close()
+        if finished:
+            with self.lock:
+                self.games = [g for g in self.games if g not in finished]
+        self.tick += 1
+
+    def tick_once(self):
+        """
+        Runs the tick that is due and returns the seconds to wait until the next.
+        """
+        now = time.monotonic()
+        if self._next_tick is None:
+            self._next_tick = now
+        lateness = abs(now - self._next_tick)
+        self.jitter += (lateness - self.jitter) * self.JITTER_GAIN
+        self.max_jitter = max(self.max_jitter, lateness)
+
+        self.step()
+
+        self._next_tick += self.tick_interval
+        now = time.monotonic()
+        if now > self._next_tick:
+            self.overruns += 1
+            if now - self._next_tick >= self.tick_interval:
+                # Too far behind, skip the missed ticks.
+                self._next_tick = now
+        return max(0.0, self._next_tick - now)
+
+    def run(self):
+        """Ticks until `stop` is called."""
+        while not self._stop_event.is_set():
+            self._stop_event.wait(self.tick_once())
+
+    def start(self):
+        """Starts ticking on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_stats(self):
+        """
+        Returns the scheduler statistics.
+
+        Returns:
+            dict: Scheduled games, ticks run, jitter (ms) and overrun count.
+        """
+        return {
+            "games": len(self.games),
+            "tick": self.tick,
+            "jitter_ms": self.jitter * 1000,
+            "max_jitter_ms": self.max_jitter * 1000,
+            "overruns": self.overruns,
+        }
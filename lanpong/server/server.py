@@ -2,17 +2,40 @@ import re
 import socket
 import threading
 import time
+from functools import partial
 from itertools import count
 import paramiko
 import numpy as np
 from ..game.game import Game
-from lanpong.server.ssh import SSHServer
-from lanpong.server.ping import Ping
+from ..game.render import (
+    CLEAR_SCREEN,
+    HIDE_CURSOR,
+    SHOW_CURSOR,
+    move_cursor,
+)
+from lanpong.server.ssh import (
+    CIPHER_PREFERENCE,
+    DEFAULT_HOST_KEY_FILES,
+    KEX_PREFERENCE,
+    PublicKeyCache,
+    SSHServer,
+    configure_transport,
+    load_host_keys,
+)
+from lanpong.server.admission import (
+    ADMIT,
+    CAPACITY_BANNER,
+    DROP,
+    REJECT,
+    AdmissionControl,
+)
+from lanpong.server.ping import Ping, keepalive_rtt
 from lanpong.server.db import DB
-
-CLEAR_SCREEN = "\x1b[H\x1b[J"
-HIDE_CURSOR = "\033[?25l"
-SHOW_CURSOR = "\033[?25h"
+from lanpong.server.credentials import CredentialVerifier
+from lanpong.server.scheduler import GameScheduler
+from lanpong.server.inputs import InputSelector
+from lanpong.server.matchmaking import Matchmaker
+from lanpong.server.output import FramePacer, FrameWriter
 
 LOGO_ASCII = """\
  _       ___   _   _ ______ _____ _   _ _____
@@ -37,6 +60,28 @@ def get_message_screen(message):
     return Game.screen_to_tui(screen)
 
 
+def get_games_screen(games):
+    """
+    Returns a screen listing running games, numbered from 1.
+    """
+    screen = Game.get_blank_screen(stats_height=0)
+    rows, cols = screen.shape
+    lines = ["Running games:", ""]
+    lines += [
+        f"[{i + 1}] {game.player1.username} vs {game.player2.username}"
+        f" ({game.score[0]}-{game.score[1]}, {game.broadcaster.spectators} watching)"[
+            : cols - 2
+        ]
+        for i, game in enumerate(games)
+    ]
+    lines += ["", "Press a number to watch, [q] to go back."]
+    top = (rows - len(lines)) // 2
+    for i, line in enumerate(lines):
+        start = (cols - len(line)) // 2
+        screen[top + i, start : start + len(line)] = list(line)
+    return Game.screen_to_tui(screen)
+
+
 def send_frame(channel, frame):
     """
     Sends a frame to the client.
@@ -44,9 +89,31 @@ def send_frame(channel, frame):
     return channel.sendall("".join([CLEAR_SCREEN, frame, HIDE_CURSOR]))
 
 
-def get_lobby_screen(db, username=""):
+WAITING_SPINNER = "|/-\\"
+
+
+def get_waiting_status(position, elapsed, tick=0):
+    """
+    Returns the ANSI sequence redrawing the status line of the waiting screen.
+
+    Parameters:
+    - position: Position of the player's game in the matchmaking queue, or None.
+    - elapsed: Seconds the player has waited.
+    - tick: Number of status updates so far, animates the spinner.
+    """
+    status = f"{WAITING_SPINNER[tick % len(WAITING_SPINNER)]} Waiting {int(elapsed)}s"
+    if position is not None:
+        status += f" - position in queue: {position}"
+    # Two rows below the message of the waiting screen.
+    return move_cursor(Game.DEFAULT_ROWS // 2 + 2, 1) + status.center(
+        Game.DEFAULT_COLS - 2
+    )
+
+
+def draw_lobby_screen(db):
     """
-    Returns the lobby screen with the leaderboard and options.
+    Returns the lobby screen with the leaderboard and options, and the row
+    left blank for the personalized welcome line.
     """
     screen = Game.get_blank_screen(stats_height=0)
     rows, cols = screen.shape
@@ -56,10 +123,11 @@ def get_lobby_screen(db, username=""):
     for i, line in enumerate(LOGO_ASCII):
         # Center each line of the logo.
         screen[1 + i, start : start + len(line)] = list(line)
-    current_row = 1 + len(LOGO_ASCII) + 1
+    welcome_row = 1 + len(LOGO_ASCII) + 1
+    current_row = welcome_row + 1
 
     for i, line in enumerate(
-        [f"Welcome to LAN PONG, {username}!", "Leaderboard:"]
+        ["Leaderboard:"]
         + [
             f"{i + 1}. {user['username']} - {user['score']}"
             for i, user in enumerate(db.get_top_users(10))
@@ -67,15 +135,59 @@ def get_lobby_screen(db, username=""):
         + [
             "",
             "Press key to proceed:",
-            "[1] Matchmaking",
-            "[2] Public key configuration",
+            "[1] Matchmaking   [2] Public key configuration   [3] Watch a game",
         ]
     ):
-        # Center each line.
-        start = (cols - len(line)) // 2
+        # Center each line, clipped to the borders.
+        line = line[: cols - 2]
+        start = max(1, (cols - len(line)) // 2)
         screen[current_row + i, start : len(line) + start] = list(line)
 
-    return Game.screen_to_tui(screen)
+    return screen, welcome_row
+
+
+class LobbyScreen:
+    """
+    Lobby screen rendered once per leaderboard version.
+
+    Everything but the welcome line is serialized when the leaderboard
+    changes, each user only costs rendering their own line.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.lock = threading.Lock()
+        self.version = None
+        self.prefix = self.suffix = ""
+        self.welcome_row = None
+
+    def _render_template(self, version):
+        screen, row = draw_lobby_screen(self.db)
+        self.prefix = Game.screen_to_tui(screen[:row])
+        self.suffix = Game.screen_to_tui(screen[row + 1 :])
+        self.welcome_row = screen[row]
+        self.version = version
+
+    def get(self, username=""):
+        """
+        Returns the lobby screen of a user.
+        """
+        with self.lock:
+            version = self.db.get_leaderboard_version()
+            if version != self.version:
+                self._render_template(version)
+            prefix, suffix, row = self.prefix, self.suffix, self.welcome_row.copy()
+
+        rank = self.db.get_rank(username)
+        welcome = f"Welcome to LAN PONG, {username}!"
+        # Inside the borders, the rank goes first if the name is too long.
+        width = len(row) - 2
+        if rank is not None and len(welcome) + len(f" Your rank: #{rank}") <= width:
+            welcome += f" Your rank: #{rank}"
+        welcome = welcome[:width]
+        start = max(1, (len(row) - len(welcome)) // 2)
+        row[start : start + len(welcome)] = list(welcome)
+        return "".join([prefix, Game.screen_to_tui([row]), suffix])
 
 
 def wait_for_char(channel, channel_file, valid_chars):
@@ -88,19 +200,142 @@ def wait_for_char(channel, channel_file, valid_chars):
             return char
 
 
+def echo_line(channel, channel_file):
+    """
+    Reads a line from the client, echoing every typed character.
+    """
+    line = ""
+
+    while True:
+        char = channel_file.read(1).decode()
+
+        # Handle backspace (ASCII 8 or '\b' or '\x7F')
+        if char in {"\x08", "\b", "\x7F"}:
+            if line:
+                # Remove the last character from the line and move the cursor back
+                line = line[:-1]
+        elif char == "\r" or char == "\n":
+            break
+        else:
+            line += char
+            channel.sendall(char)
+    return line
+
+
+def run_sync(coroutine):
+    """
+    Runs a coroutine that never suspends, e.g. a flow over a ChannelTerminal.
+
+    Parameters:
+    - coroutine: The coroutine to run to completion.
+
+    Returns:
+    - The value the coroutine returned.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("A blocking flow suspended")
+
+
+class ChannelTerminal:
+    """
+    The client's terminal, over a paramiko channel.
+
+    The lobby and registration flows of `Server` are coroutines, shared with
+    the asyncssh server. Here every step blocks the client's thread instead
+    of suspending, so the flows are run with `run_sync`.
+    """
+
+    def __init__(self, channel, channel_file):
+        """
+        Initialize the terminal.
+
+        Parameters:
+        - channel: The paramiko Channel of the client.
+        - channel_file: The file reading from channel.
+        """
+        self.channel = channel
+        self.channel_file = channel_file
+
+    def send_frame(self, frame):
+        """Clears the terminal and shows frame."""
+        send_frame(self.channel, frame)
+
+    async def wait_for_char(self, valid_chars):
+        """Waits for a character in valid_chars."""
+        char = wait_for_char(self.channel, self.channel_file, valid_chars)
+        if char is None:
+            raise ConnectionError("Client disconnected")
+        return char
+
+    async def echo_line(self):
+        """Reads a line, echoing every typed character."""
+        return echo_line(self.channel, self.channel_file)
+
+    async def sleep(self, seconds):
+        """Blocks the client's thread for seconds."""
+        time.sleep(seconds)
+
+    async def result(self, future):
+        """Waits for a concurrent.futures.Future, e.g. of the CredentialVerifier."""
+        return future.result()
+
+
 class Server:
-    def __init__(self, key_file_name="test_key") -> None:
+    # Seconds between two updates of the waiting screen's status line.
+    WAITING_STATUS_INTERVAL = 1
+    # Seconds a rejected client has to read the banner before it is disconnected.
+    REJECT_TIMEOUT = 5
+    # Seconds to wait for the input thread to stop reading a channel.
+    UNREGISTER_TIMEOUT = 1
+
+    def __init__(
+        self,
+        key_file_name=DEFAULT_HOST_KEY_FILES,
+        db=None,
+        rating_window=None,
+        admission=None,
+        kex=KEX_PREFERENCE,
+        ciphers=CIPHER_PREFERENCE,
+        credentials=None,
+        min_fps=FramePacer.MIN_FPS,
+        max_fps=FramePacer.MAX_FPS,
+    ) -> None:
         self.lock = threading.Lock()
-        self.db = DB()
-        self.server_key = paramiko.RSAKey.from_private_key_file(filename=key_file_name)
+        # Any object implementing the DB interface, e.g. SQLiteDB.
+        self.db = db if db is not None else DB()
+        self.lobby_screen = LobbyScreen(self.db)
+        # Hashes and checks passwords on its own worker pool.
+        self.credentials = (
+            credentials if credentials is not None else CredentialVerifier(self.db)
+        )
+        # Host key file(s), and algorithms offered to clients in order of preference.
+        self.key_file_name = key_file_name
+        self.host_keys = load_host_keys(key_file_name)
+        self.kex = kex
+        self.ciphers = ciphers
         # Set of usernames of connected clients.
         # Used to prevent multiple connections from the same user.
         self.connections = set()
         self.waiting_screen = get_message_screen(
             f"You are player 1. Waiting for player 2..."
         )
-        self.games = []
-        self.games_lock = threading.Lock()
+        # Pairs players by arrival, or by score within a widening window.
+        self.matchmaker = Matchmaker(rating_window=rating_window)
+        # Advances every game from a single thread.
+        self.scheduler = GameScheduler()
+        # Reads the keys of every player from a single thread.
+        self.input_selector = InputSelector()
+        # Parsed public keys, shared by the SSHServer of every connection.
+        self.public_keys = PublicKeyCache()
+        # Limits connections, concurrent handshakes and connections per IP.
+        self.admission = admission if admission is not None else AdmissionControl()
+        # Bounds of the frame rate each client gets, depending on its link.
+        self.min_fps = min_fps
+        self.max_fps = max_fps
 
     def start_server(self, host="0.0.0.0", port=2222):
         """Starts an SSH server on specified port and address
@@ -117,24 +352,181 @@ class Server:
             server_sock.bind((host, port))
             server_sock.listen(100)
             print(f"Listening for connection on {host}:{port}")
+            self.scheduler.start()
+            self.input_selector.start()
 
             # Accept multiple connections, thread-out
             while True:
                 client_socket, client_addr = server_sock.accept()
+                decision = self.admission.admit(client_addr[0])
+                if decision == DROP:
+                    client_socket.close()
+                    continue
                 print(f"Incoming connection from {client_addr[0]}:{client_addr[1]}")
                 client_thread = threading.Thread(
-                    target=self.handle_client, args=(client_socket,)
+                    target=(
+                        self.handle_client if decision == ADMIT else self.reject_client
+                    ),
+                    args=(client_socket,),
                 )
                 client_thread.start()
 
-    def handle_game(self, game: Game):
+    def reject_client(self, client_socket):
         """
-        Handles the non-paddle game updates (mainly the ball)
+        Tells a client that the server is full through the SSH banner.
         """
-        game.is_game_started_event.wait()
-        while game.loser == 0:
-            game.update_game()
-            time.sleep(0.05)
+        transport = None
+        try:
+            transport = paramiko.Transport(client_socket)
+            configure_transport(transport, self.host_keys, self.kex, self.ciphers)
+            transport.start_server(
+                server=SSHServer(self, reject_banner=CAPACITY_BANNER)
+            )
+            # Nobody can authenticate, wait for the client to give up.
+            transport.accept(self.REJECT_TIMEOUT)
+        except Exception as e:
+            print(f"Exception: {e}")
+        finally:
+            if transport is not None:
+                transport.close()
+            client_socket.close()
+            self.admission.release(REJECT)
+
+    def get_running_games(self, num=9):
+        """
+        Returns up to num games being played, oldest first
+        """
+        return [
+            game
+            for game in self.scheduler.games
+            if game.is_game_started_event.is_set() and game.loser == 0
+        ][:num]
+
+    async def lobby(self, terminal, user, spectate):
+        """
+        Shows the lobby until the user chooses to play.
+
+        Parameters:
+        - terminal: The ChannelTerminal, or its asyncssh counterpart.
+        - user: The logged in user.
+        - spectate: Coroutine function streaming a game to the user.
+        """
+        terminal.send_frame(self.lobby_screen.get(user["username"]))
+        while (char := await terminal.wait_for_char({"1", "2", "3"})) != "1":
+            if char == "2":
+                await self.add_public_key(terminal, user)
+            else:
+                await self.watch_game(terminal, spectate)
+            terminal.send_frame(self.lobby_screen.get(user["username"]))
+
+    async def watch_game(self, terminal, spectate):
+        """
+        Lets the client pick a running game and streams it read-only.
+
+        Parameters:
+        - terminal: The client's terminal.
+        - spectate: Coroutine function streaming a game to the user.
+        """
+        games = self.get_running_games()
+        if not games:
+            terminal.send_frame(get_message_screen("No games are running right now."))
+            await terminal.sleep(2)
+            return
+        terminal.send_frame(get_games_screen(games))
+        choices = {str(i + 1) for i in range(len(games))}
+        choice = await terminal.wait_for_char(choices | {"q"})
+        if choice in choices:
+            await spectate(games[int(choice) - 1])
+
+    async def register_account(self, terminal):
+        """
+        Prompts a new user for a username and password and registers them.
+        """
+        for i in count():
+            # Repeat until have a valid username.
+            message = (
+                "Welcome to LAN PONG!\r\n"
+                "Please create an account.\r\n"
+                "Enter your desired username: "
+                if i == 0
+                else "Username either already exists or contains invalid characters( No white spaces or empty string).\r\n"
+                "Please enter another username: "
+            )
+            terminal.send_frame(message)
+            username = await terminal.echo_line()
+            if self.db.is_username_valid(username):
+                break
+
+        # Get password (empty is ok).
+        terminal.send_frame("Enter your password (empty for no password):")
+        password = await terminal.echo_line()
+
+        # Add newly registered user to the database.
+        await terminal.result(self.credentials.create_user(username, password))
+        terminal.send_frame(
+            "Account registered successfully. Please login with your credentials.\r\n",
+        )
+
+    async def add_public_key(self, terminal, user):
+        """
+        Prompts the user for a public key and stores it.
+        """
+        # Only support ed25519.
+        key_types = {"1": "ed25519"}
+        terminal.send_frame("Please select a key type:\r\n1. Ed25519\r\n")
+        choice = await terminal.wait_for_char(set(key_types.keys()))
+
+        key_type = key_types[choice]
+        terminal.send_frame(
+            f"Please paste your {key_type} public key (entire content):\r\n",
+        )
+        # Receive the public key and add it to the database.
+        public_key = await terminal.echo_line()
+        self.db.update_user(
+            user["id"], {"public_key": public_key, "key_type": key_type}
+        )
+        self.public_keys.invalidate(user["username"])
+
+    async def finish_game(self, terminal, user, game: Game, player_id):
+        """
+        Credits the winner of a game that is over and shows who won.
+        """
+        winner_id = 1 if game.loser == 2 else 2
+        winner = game.player1 if winner_id == 1 else game.player2
+
+        if player_id == winner_id:
+            self.db.update_user(user["id"], {"score": user["score"] + 1})
+
+        terminal.send_frame(get_message_screen(f"{winner.username} wins!"))
+        await terminal.sleep(2)
+
+    def spectate(self, channel, game: Game, ssh_server=None):
+        """
+        Streams a game to a spectator until it ends or the spectator presses q.
+
+        Spectators get the frames every viewer shares. Frames that arrive while
+        the channel can't take more data are dropped, never buffered.
+        """
+        stop = threading.Event()
+        self.input_selector.register(channel, lambda data: b"q" in data and stop.set())
+        writer = FrameWriter(channel)
+        pacer = FramePacer(self.min_fps, self.max_fps)
+        tick = -1
+        try:
+            with game.broadcaster.watch():
+                while game.loser == 0 and not stop.is_set() and not channel.closed:
+                    frame = game.wait_for_frame(tick, timeout=1)
+                    if frame is None:
+                        continue
+                    tick = frame.tick
+                    if ssh_server is not None:
+                        writer.resize(ssh_server.term_size)
+                    writer.write(frame)
+                    pacer.update(writer)
+                    time.sleep(pacer.delay())
+        finally:
+            # The lobby reads the channel next, keys typed from now on are its.
+            self.input_selector.unregister(channel).wait(self.UNREGISTER_TIMEOUT)
 
     def handle_ping(self, game: Game, ping: Ping, name, player_id):
         """
@@ -143,56 +535,57 @@ class Server:
         game.is_game_started_event.wait()
         while game.loser == 0:
             game.update_network_stats(f"{name}'s PING: {ping.get():.3F}ms", player_id)
-            time.sleep(0.05)
-
-    def echo_line(self, channel_file, channel):
-        line = ""
-
-        while True:
-            char = channel_file.read(1).decode()
+            game.update_network_stats(ping.get_summary(), player_id, line=1)
+            time.sleep(Ping.INTERVAL)
 
-            # Handle backspace (ASCII 8 or '\b' or '\x7F')
-            if char in {"\x08", "\b", "\x7F"}:
-                if line:
-                    # Remove the last character from the line and move the cursor back
-                    line = line[:-1]
-            elif char == "\r" or char == "\n":
-                break
-            else:
-                line += char
-                channel.sendall(char)
-        return line
-
-    def get_game_or_create(self, username):
+    def get_game_or_create(self, username, score=0):
         """
         Returns a game that is not full, or creates a new one
         Returns:
             (Game, int): Game and player id
         """
-        with self.games_lock:
-            # Get a game that is not full, or None if all games are full.
-            game = next((g for g in self.games if not g.is_full()), None)
-            if game is None:
-                # No game available, create a new one.
-                game = Game()
-                self.games.append(game)
-                # Create a thread for this game and start it.
-                game_thread = threading.Thread(target=self.handle_game, args=(game,))
-                game_thread.start()
-            player_id = game.initialize_player(username)
-            return game, player_id
+        game, player_id = self.matchmaker.join(username, score)
+        if game.is_full():
+            self.start_game(game)
+        return game, player_id
+
+    def rematch(self):
+        """
+        Pairs players who are already waiting, now that they waited longer
+        """
+        for game in self.matchmaker.rematch():
+            self.start_game(game)
+
+    def leave_game(self, game: Game):
+        """
+        Closes the game of a player who left while waiting for an opponent
+        """
+        if game is not None and not game.is_full():
+            self.matchmaker.cancel(game)
+
+    def start_game(self, game: Game):
+        """
+        Starts running the updates of a game that just got its second player
+        """
+        self.scheduler.add(game)
 
     def handle_client(self, client_socket):
         """
         Handles a client connection.
         """
+        channel = game = transport = None
         try:
             # Initialize the SSH server protocol for this connection.
             transport = paramiko.Transport(client_socket)
             ssh_server = SSHServer(self)
-            transport.add_server_key(self.server_key)
-            transport.start_server(server=ssh_server)
-            channel = transport.accept(20)
+            configure_transport(transport, self.host_keys, self.kex, self.ciphers)
+            if not self.admission.begin_handshake():
+                raise ValueError("Handshake queue timeout")
+            try:
+                transport.start_server(server=ssh_server)
+                channel = transport.accept(20)
+            finally:
+                self.admission.end_handshake()
             if channel is None:
                 raise ValueError("No channel")
 
@@ -202,113 +595,91 @@ class Server:
 
             channel_file = channel.makefile()
 
-            # Helper functions for handling keystokes and registration:
-            def register_account():
-                for i in count():
-                    # Repeat until have a valid username.
-                    message = (
-                        "Welcome to LAN PONG!\r\n"
-                        "Please create an account.\r\n"
-                        "Enter your desired username: "
-                        if i == 0
-                        else "Username either already exists or contains invalid characters( No white spaces or empty string).\r\n"
-                        "Please enter another username: "
-                    )
-                    send_frame(channel, message)
-                    username = self.echo_line(channel_file, channel)
-                    if self.db.is_username_valid(username):
-                        break
-
-                # Get password (empty is ok).
-                send_frame(channel, "Enter your password (empty for no password):")
-                password = self.echo_line(channel_file, channel)
-
-                # Add newly registered user to the database.
-                self.db.create_user(username, password)
-                send_frame(
-                    channel,
-                    "Account registered successfully. Please login with your credentials.\r\n",
-                )
-
-            def add_public_key():
-                # Only support ed25519.
-                key_types = {"1": "ed25519"}
-                send_frame(channel, "Please select a key type:\r\n1. Ed25519\r\n")
-                choice = wait_for_char(channel, channel_file, set(key_types.keys()))
-
-                key_type = key_types[choice]
-                send_frame(
-                    channel,
-                    f"Please paste your {key_type} public key (entire content):\r\n",
-                )
-                # Receive the public key and add it to the database.
-                public_key = self.echo_line(channel_file, channel)
-                self.db.update_user(
-                    user["id"], {"public_key": public_key, "key_type": key_type}
-                )
-
-            def handle_input(player_id, game):
-                while True:
-                    try:
-                        key = channel_file.read(1) if channel.recv_ready() else b""
-                    except Exception as e:
-                        print(f"Exception: {e}")
-                        break
-                    # Update the paddles location based on the key pressed.
-                    game.update_paddle(player_id, key)
-                    time.sleep(0.05)
+            terminal = ChannelTerminal(channel, channel_file)
 
             # If username is new prompt to register.
             if user["username"] == "new":
-                register_account()
+                run_sync(self.register_account(terminal))
                 return
 
             # Show lobby and match making option screen.
-            send_frame(channel, get_lobby_screen(self.db, user["username"]))
-            while (char := wait_for_char(channel, channel_file, {"1", "2"})) == "2":
-                add_public_key()
-                send_frame(channel, get_lobby_screen(self.db, user["username"]))
-            game, player_id = self.get_game_or_create(user["username"])
+            async def spectate(game):
+                self.spectate(channel, game, ssh_server)
+
+            run_sync(self.lobby(terminal, user, spectate))
+            game, player_id = self.get_game_or_create(user["username"], user["score"])
             game.set_player_ready(player_id, True)
 
             # Show waiting screen until there are two players.
-            while not game.is_full():
+            if not game.is_full():
                 send_frame(channel, self.waiting_screen)
-                time.sleep(0.5)
-
+                started = time.monotonic()
+                for tick in count():
+                    if game.is_full_event.wait(self.WAITING_STATUS_INTERVAL):
+                        break
+                    self.rematch()
+                    status = get_waiting_status(
+                        self.matchmaker.position(game),
+                        time.monotonic() - started,
+                        tick,
+                    )
+                    channel.sendall(status)
+                # A rematch may have paired the player into another game.
+                game, player_id = self.matchmaker.follow(game, player_id)
+                game.set_player_ready(player_id, True)
+
+            # Keys are read as they arrive and applied on the next game tick.
+            self.input_selector.register(channel, partial(game.queue_input, player_id))
+            # Time SSH keepalives over the existing connection.
+            ping = Ping(partial(keepalive_rtt, transport))
             # Start thread to read ping (response time).
-            input_thread = threading.Thread(target=handle_input, args=(player_id, game))
-            input_thread.start()
             ping_thread = threading.Thread(
                 target=self.handle_ping,
-                args=(
-                    game,
-                    Ping(channel.getpeername()[0]),
-                    user["username"],
-                    player_id,
-                ),
+                args=(game, ping, user["username"], player_id),
             )
             ping_thread.start()
 
-            # Send the current TUI representation of the game state.
-            while game.loser == 0:
-                send_frame(channel, str(game))
-                time.sleep(0.05)
+            # Send each tick's shared frame, only the cells that changed if possible.
+            # Frames the client can't take yet are dropped rather than queued, and
+            # the frame rate follows what the client's link can take.
+            writer = FrameWriter(channel)
+            pacer = FramePacer(self.min_fps, self.max_fps)
+            tick = -1
+            # Frames are only encoded for games someone watches.
+            with game.broadcaster.watch(spectator=False):
+                while game.loser == 0:
+                    frame = game.wait_for_frame(tick, timeout=1)
+                    if frame is None:
+                        continue
+                    tick = frame.tick
+                    # Fit frames to the terminal, which may be resized at any time.
+                    writer.resize(ssh_server.term_size)
+                    writer.write(frame)
+                    pacer.update(writer, ping.stats.mean)
+                    time.sleep(pacer.delay())
+            if writer.frames_dropped:
+                print(
+                    f"{user['username']}: dropped {writer.frames_dropped} of"
+                    f" {writer.frames_sent + writer.frames_dropped} frames"
+                )
             # Game is over
-            winner_id = 1 if game.loser == 2 else 2
-            winner = game.player1 if winner_id == 1 else game.player2
-
-            if player_id == winner_id:
-                self.db.update_user(user["id"], {"score": user["score"] + 1})
-
-            send_frame(channel, get_message_screen(f"{winner.username} wins!"))
-            time.sleep(2)
+            run_sync(self.finish_game(terminal, user, game, player_id))
         except Exception as e:
             print(f"Exception: {e}")
         finally:
-            # Clean up.
-            if channel is not None:
-                self.connections.remove(user["username"])
-                send_frame(channel, SHOW_CURSOR)
-            transport.close()
-            client_socket.close()
+            # Clean up. The client may be gone already, nothing here may keep
+            # the connection from being closed and its slot from being freed.
+            try:
+                self.leave_game(game)
+                if channel is not None:
+                    self.input_selector.unregister(channel)
+                    self.connections.discard(user["username"])
+                    try:
+                        send_frame(channel, SHOW_CURSOR)
+                    except OSError:
+                        pass
+            finally:
+                if transport is not None:
+                    transport.close()
+                client_socket.close()
+                self.admission.release(ADMIT)
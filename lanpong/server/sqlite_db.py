@@ -0,0 +1,283 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from lanpong.server.credentials import verify_password
+from lanpong.server.db import DB
+from lanpong.server.leaderboard import Leaderboard
+
+COLUMNS = ("id", "username", "password", "score", "public_key", "key_type")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    score INTEGER NOT NULL DEFAULT 0,
+    public_key TEXT,
+    key_type TEXT
+);
+CREATE INDEX IF NOT EXISTS users_score ON users (score DESC, id);
+"""
+
+
+class SQLiteDB:
+    """
+    SQLite implementation of the `DB` interface.
+
+    Uses a WAL journal so readers never block the writer, a unique index on
+    username and an index on score. Queries run on a small pool of
+    connections, each caching the prepared statements below, checked out for
+    the duration of a call: the server runs a thread per client, and a
+    connection per thread would pile up with every login.
+
+    Ranks are served from an in-memory `Leaderboard`, as in `DB`, kept in
+    step with the table by every write that changes a score.
+    """
+
+    POOL_SIZE = 4
+
+    def __init__(
+        self, filename="users.db", json_filename="users.json", pool_size=POOL_SIZE
+    ):
+        """
+        Initialize the SQLiteDB object.
+
+        Args:
+            filename (str): The name of the SQLite database file.
+            json_filename (str): JSON database imported if the table is empty.
+            pool_size (int): Number of connections shared by every thread.
+        """
+        self.filename = filename
+        self.path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), self.filename
+        )
+        # Serializes writes with the matching leaderboard updates.
+        self.lock = threading.Lock()
+        self.leaderboard = Leaderboard()
+        # Leaderboard changes made through this object.
+        self._leaderboard_version = 0
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+        with self.connection() as connection, connection:
+            connection.executescript(SCHEMA)
+        if json_filename is not None:
+            self.import_json(json_filename)
+        with self.connection() as connection:
+            for user_id, score in connection.execute("SELECT id, score FROM users"):
+                self.leaderboard.update(user_id, score)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out of the pool, waiting for one if needed."""
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def close(self):
+        """
+        Close the connections of the pool.
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def import_json(self, json_filename):
+        """
+        Import the users of a JSON database, if no user exists yet.
+
+        Args:
+            json_filename (str): The name of the JSON file used by `DB`.
+
+        Returns:
+            int: The number of imported users.
+        """
+        with self.connection() as connection:
+            if connection.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                return 0
+        json_path = os.path.join(os.path.dirname(self.path), json_filename)
+        if not Path(json_path).is_file():
+            return 0
+        # Let DB replay its append log as well.
+        json_db = DB(json_path)
+        json_db.close()
+        with self.connection() as connection, connection:
+            connection.executemany(
+                "INSERT INTO users (id, username, password, score, public_key, key_type)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    tuple(user.get(column) for column in COLUMNS)
+                    for user in json_db.users
+                ],
+            )
+        for user in json_db.users:
+            self.leaderboard.update(user["id"], user["score"])
+        return len(json_db.users)
+
+    @staticmethod
+    def _to_dict(row):
+        return dict(row) if row is not None else None
+
+    def is_username_valid(self, username):
+        """
+        Check if the given username is unique in the user table.
+
+        Args:
+            username (str): The username to check.
+
+        Returns:
+            bool: True if the username is unique, False otherwise.
+        """
+        if username == "" or re.search(r"\s", username):
+            return False
+        return self.get_user(username) is None
+
+    def create_user(self, username, password, score=0):
+        """
+        Create a new user with sanitization and unique username checking.
+
+        Args:
+            username (str): The new username.
+            password (str): The password for the new user.
+            score (int): The initial score for the new user (default is 0).
+
+        Raises:
+            ValueError: If the username is not unique or if either username or password is empty.
+        """
+        if not username or not password:
+            raise ValueError("Username and password are required.")
+        if not self.is_username_valid(username):
+            raise ValueError("Username already exists.")
+        with self.lock:
+            try:
+                with self.connection() as connection, connection:
+                    user_id = connection.execute(
+                        "INSERT INTO users (username, password, score) VALUES (?, ?, ?)",
+                        (username, password, score),
+                    ).lastrowid
+            except sqlite3.IntegrityError:
+                raise ValueError("Username already exists.")
+            self.leaderboard.update(user_id, score)
+            self._leaderboard_version += 1
+
+    def update_user(self, user_id, new_data):
+        """
+        Update user information based on the user's ID.
+
+        Args:
+            user_id (int): The ID of the user to update.
+            new_data (dict): A dictionary containing the new data to update for the user.
+
+        Raises:
+            ValueError: If new_data contains an unknown field.
+        """
+        unknown = set(new_data) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+        if not new_data:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in new_data)
+        with self.lock:
+            with self.connection() as connection, connection:
+                updated = connection.execute(
+                    f"UPDATE users SET {assignments} WHERE id = ?",
+                    (*new_data.values(), user_id),
+                ).rowcount
+            if updated and "score" in new_data:
+                self.leaderboard.update(user_id, new_data["score"])
+            if updated and ("score" in new_data or "username" in new_data):
+                self._leaderboard_version += 1
+
+    def login(self, username, password):
+        """
+        Attempt to authenticate a user with the provided username and password.
+
+        Args:
+            username (str): The username to authenticate.
+            password (str): The password to authenticate.
+
+        Returns:
+            dict: User information if authentication is successful, None otherwise.
+        """
+        user = self.get_user(username)
+        if user is not None and verify_password(password, user["password"]):
+            return user
+        return None
+
+    def get_user(self, username):
+        """
+        Retrieve a user by their username.
+
+        Args:
+            username (str): The username to retrieve.
+
+        Returns:
+            dict or None: The user information if a user with the given username exists, None otherwise.
+        """
+        with self.connection() as connection:
+            return self._to_dict(
+                connection.execute(
+                    "SELECT * FROM users WHERE username = ?", (username,)
+                ).fetchone()
+            )
+
+    def get_top_users(self, num):
+        """
+        Get the top users based on their score.
+
+        Args:
+            num (int): The number of users to return.
+
+        Returns:
+            list: A list of the top users.
+        """
+        with self.connection() as connection:
+            return [
+                dict(row)
+                for row in connection.execute(
+                    "SELECT * FROM users ORDER BY score DESC, id LIMIT ?", (num,)
+                )
+            ]
+
+    def get_leaderboard_version(self):
+        """
+        Get a counter incremented whenever the leaderboard changes.
+
+        Returns:
+            int: The leaderboard version.
+        """
+        with self.lock:
+            return self._leaderboard_version
+
+    def get_rank(self, username):
+        """
+        Get the leaderboard position of a user.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            int or None: The 1-based rank, None if the user does not exist.
+        """
+        with self.connection() as connection:
+            row = connection.execute(
+                "SELECT id FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return self.leaderboard.rank(row["id"]) if row is not None else None
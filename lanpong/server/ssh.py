@@ -1,21 +1,174 @@
+import os
+import threading
+
 import paramiko
 import lanpong.server.db as db
 from io import StringIO
 import base64
 
+# Host key files tried by default. Ed25519 signs a handshake much faster than
+# RSA, which stays as a fallback for clients without Ed25519 support.
+DEFAULT_HOST_KEY_FILES = ("test_key_ed25519", "test_key")
+# Host key algorithms, most preferred first.
+HOST_KEY_PREFERENCE = (
+    "ssh-ed25519",
+    "ecdsa-sha2-nistp256",
+    "ecdsa-sha2-nistp384",
+    "ecdsa-sha2-nistp521",
+    "ssh-rsa",
+)
+# Key exchange and cipher algorithms offered to clients, most preferred first.
+KEX_PREFERENCE = (
+    "curve25519-sha256@libssh.org",
+    "ecdh-sha2-nistp256",
+    "diffie-hellman-group16-sha512",
+    "diffie-hellman-group14-sha256",
+)
+CIPHER_PREFERENCE = (
+    "aes128-gcm@openssh.com",
+    "aes256-gcm@openssh.com",
+    "aes128-ctr",
+    "aes256-ctr",
+)
+
+
+def find_host_key_files(filenames):
+    """
+    Find the host key files that exist.
+
+    Parameters:
+    - filenames: A private key file, or several.
+
+    Returns:
+    - List of the existing files, raises FileNotFoundError if there is none.
+    """
+    if isinstance(filenames, (str, os.PathLike)):
+        filenames = [filenames]
+    found = [filename for filename in filenames if os.path.isfile(filename)]
+    if not found:
+        raise FileNotFoundError(
+            f"No host key found in {', '.join(map(str, filenames))}"
+        )
+    return found
+
+
+def host_key_rank(algorithm):
+    """Sort key putting the most preferred host key algorithm first."""
+    if algorithm in HOST_KEY_PREFERENCE:
+        return HOST_KEY_PREFERENCE.index(algorithm)
+    return len(HOST_KEY_PREFERENCE)
+
+
+def load_host_keys(filenames):
+    """
+    Load the server's host keys, once at startup.
+
+    Parameters:
+    - filenames: A private key file, or several. Missing files are skipped.
+
+    Returns:
+    - List of paramiko.PKey, most preferred key type first.
+    """
+    keys = [paramiko.PKey.from_path(name) for name in find_host_key_files(filenames)]
+    return sorted(keys, key=lambda key: host_key_rank(key.get_name()))
+
+
+def configure_transport(
+    transport, host_keys, kex=KEX_PREFERENCE, ciphers=CIPHER_PREFERENCE
+):
+    """
+    Set up the host keys and the algorithms offered on a server transport.
+
+    Parameters:
+    - transport: The paramiko Transport of the client.
+    - host_keys: Host keys from `load_host_keys`.
+    - kex: Key exchange algorithms, most preferred first.
+    - ciphers: Ciphers, most preferred first.
+    """
+    for key in host_keys:
+        transport.add_server_key(key)
+    options = transport.get_security_options()
+    # Unsupported algorithms are ignored rather than rejected.
+    options.kex = [name for name in kex if name in options.kex]
+    options.ciphers = [name for name in ciphers if name in options.ciphers]
+
+
+class PublicKeyCache:
+    """
+    Parsed public keys of the users.
+
+    Clients offer several keys per login, so each stored key is decoded once
+    and authentication becomes a lookup and a comparison. Entries are keyed
+    by username and checked against the stored key string, so an updated key
+    is never compared against a stale one.
+    """
+
+    # Key types users may register, by the name stored in the database.
+    KEY_CLASSES = {"ed25519": paramiko.ed25519key.Ed25519Key}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._keys = {}
+
+    def get(self, user):
+        """
+        Get the public key of a user.
+
+        Parameters:
+        - user: The user, as returned by the database.
+
+        Returns:
+        - The key in SSH wire format, None if the user has no valid key.
+        """
+        stored = (user.get("key_type"), user.get("public_key"))
+        with self.lock:
+            entry = self._keys.get(user["username"])
+        if entry is not None and entry[0] == stored:
+            return entry[1]
+
+        key = None
+        try:
+            key_class = self.KEY_CLASSES[stored[0]]
+            key = key_class(data=base64.b64decode(stored[1].split(" ", 3)[1])).asbytes()
+        except Exception:
+            pass
+        with self.lock:
+            self._keys[user["username"]] = (stored, key)
+        return key
+
+    def invalidate(self, username):
+        """Forget the key of a user, e.g. after it was replaced."""
+        with self.lock:
+            self._keys.pop(username, None)
+
+
+def get_term_size(width, height):
+    """
+    Returns the (rows, columns) of a terminal, None if the client didn't say.
+    """
+    if width <= 0 or height <= 0:
+        return None
+    return height, width
+
 
 class SSHServer(paramiko.ServerInterface):
-    def __init__(self, server):
+    def __init__(self, server, reject_banner=None):
         """
         Initialize the SSH server.
 
         Parameters:
         - server: Instance of the server containing a database, user information, lock, and connections.
+        - reject_banner: If set, no authentication succeeds and this banner is sent instead.
         """
         self.db = server.db
         self.user = None
         self.lock = server.lock
         self.connections = server.connections
+        self.public_keys = server.public_keys
+        self.credentials = server.credentials
+        self.reject_banner = reject_banner
+        # Rows and columns of the client's terminal, None until it is known.
+        self.term_size = None
 
     def check_channel_request(self, kind, chanid):
         """
@@ -50,7 +203,26 @@ class SSHServer(paramiko.ServerInterface):
         Returns:
         - True if the PTY request is allowed.
         """
-        # Investigate whether useful for draw
+        self.term_size = get_term_size(width, height)
+        return True
+
+    def check_channel_window_change_request(
+        self, channel, width, height, pixelwidth, pixelheight
+    ):
+        """
+        Callback for the client's terminal being resized.
+
+        Parameters:
+        - channel: The channel of the terminal.
+        - width: New width of the terminal.
+        - height: New height of the terminal.
+        - pixelwidth: New width of the terminal in pixels.
+        - pixelheight: New height of the terminal in pixels.
+
+        Returns:
+        - True, the new size is used from the next frame on.
+        """
+        self.term_size = get_term_size(width, height)
         return True
 
     def check_channel_shell_request(self, channel):
@@ -76,8 +248,11 @@ class SSHServer(paramiko.ServerInterface):
         Returns:
         - paramiko.AUTH_SUCCESSFUL if authentication is successful, else paramiko.AUTH_FAILED.
         """
+        if self.reject_banner is not None:
+            return paramiko.AUTH_FAILED
         try:
-            self.user = self.db.login(username, password)
+            # Hashing runs on the verifier's pool, outside the DB lock.
+            self.user = self.credentials.login(username, password).result()
             if self.user:
                 return paramiko.AUTH_SUCCESSFUL
             return paramiko.AUTH_FAILED
@@ -95,13 +270,12 @@ class SSHServer(paramiko.ServerInterface):
         Returns:
         - paramiko.AUTH_SUCCESSFUL if authentication is successful, else paramiko.AUTH_FAILED.
         """
+        if self.reject_banner is not None:
+            return paramiko.AUTH_FAILED
         try:
             user = self.db.get_user(username)
-            key_gen_func = {"ed25519": paramiko.ed25519key.Ed25519Key}
-
-            pbk = user["public_key"].split(" ", 3)
-            user_key = key_gen_func[user["key_type"]](data=base64.b64decode(pbk[1]))
-            if key == user_key:
+            user_key = self.public_keys.get(user)
+            if user_key is not None and key.asbytes() == user_key:
                 self.user = user
                 return paramiko.AUTH_SUCCESSFUL
             return paramiko.AUTH_FAILED
@@ -118,6 +292,8 @@ class SSHServer(paramiko.ServerInterface):
         Returns:
         - Comma-separated string of allowed authentication methods.
         """
+        if self.reject_banner is not None:
+            return "none"
         with self.lock:
             if (not username == "new") and (username in self.connections):
                 return "none"
@@ -135,6 +311,8 @@ class SSHServer(paramiko.ServerInterface):
         Callback for getting a banner to send to clients during connection.
 
         Returns:
-        - Tuple containing the banner text ("LAN PONG\r\n") and language code ("en-US").
+        - Tuple containing the banner text ("LAN PONG\r\n", or the rejection banner) and language code ("en-US").
         """
+        if self.reject_banner is not None:
+            return (self.reject_banner, "en-US")
         return ("LAN PONG\r\n", "en-US")
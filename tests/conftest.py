@@ -12,3 +12,13 @@ def go_to_tmpdir(request):
     # Chdir only for the duration of the test.
     with tmpdir.as_cwd():
         yield
+
+
+@pytest.fixture
+def db(tmpdir):
+    """A JSON user store in the test's temp dir, closed after the test."""
+    from lanpong.server.db import DB
+
+    db = DB(str(tmpdir.join("users.json")))
+    yield db
+    db.close()
@@ -0,0 +1,37 @@
+from lanpong.server.admission import ADMIT, DROP, REJECT, AdmissionControl
+
+
+def test_connections_over_capacity_are_rejected_then_dropped():
+    admission = AdmissionControl(max_connections=1, burst=100)
+    assert admission.admit("10.0.0.1") == ADMIT
+    decisions = [
+        admission.admit("10.0.0.2") for _ in range(AdmissionControl.MAX_REJECTIONS + 1)
+    ]
+    assert decisions[:-1] == [REJECT] * AdmissionControl.MAX_REJECTIONS
+    assert decisions[-1] == DROP
+
+    admission.release(ADMIT)
+    assert admission.admit("10.0.0.3") == ADMIT
+    stats = admission.get_stats()
+    assert (stats["admitted"], stats["rejected"], stats["dropped"]) == (2, 8, 1)
+
+
+def test_each_address_is_rate_limited(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    admission = AdmissionControl(rate=1, burst=2)
+
+    assert [admission.admit("10.0.0.1") for _ in range(3)] == [ADMIT, ADMIT, DROP]
+    assert admission.admit("10.0.0.2") == ADMIT
+    now[0] = 1.0
+    assert admission.admit("10.0.0.1") == ADMIT
+    assert admission.get_stats()["rate_limited"] == 1
+
+
+def test_handshake_slots_are_bounded():
+    admission = AdmissionControl(max_handshakes=1)
+    assert admission.begin_handshake(timeout=0)
+    assert not admission.begin_handshake(timeout=0)
+    admission.end_handshake()
+    assert admission.begin_handshake(timeout=0)
+    assert admission.get_stats()["handshake_timeouts"] == 1
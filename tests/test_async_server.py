@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import paramiko
+import pytest
+
+from lanpong.bench.handshake import write_host_key
+from lanpong.server.async_server import AsyncServer
+from lanpong.server.credentials import CredentialVerifier
+from tests.test_server import read_until
+
+
+def make_server(tmpdir, db):
+    return AsyncServer(
+        write_host_key(str(tmpdir), "ed25519"),
+        db=db,
+        credentials=CredentialVerifier(db, n=2**4),
+    )
+
+
+def test_waiting_player_wakes_up_when_an_opponent_joins(tmpdir, db):
+    server = make_server(tmpdir, db)
+    written = []
+    process = SimpleNamespace(stdout=SimpleNamespace(write=written.append))
+    try:
+        game, _ = server.get_game_or_create("alice")
+        # The opponent joins from another thread, half-way through an interval.
+        server.WAITING_STATUS_INTERVAL = 10
+        threading.Timer(0.1, server.get_game_or_create, args=("bob",)).start()
+        started = time.monotonic()
+        asyncio.run(server.wait_for_opponent(process, game))
+        assert time.monotonic() - started < 5
+        assert game.is_full() and written == []
+    finally:
+        server.credentials.close()
+
+
+@pytest.fixture
+def serving(tmpdir, db):
+    """An AsyncServer listening on a free port, on a loop of its own."""
+    server = make_server(tmpdir, db)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    stop = threading.Event()
+
+    async def serve():
+        task = asyncio.create_task(server.serve("127.0.0.1", port))
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    # asyncio.run cancels the sessions still running once serve returns.
+    thread = threading.Thread(target=asyncio.run, args=(serve(),))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield server, port
+    stop.set()
+    thread.join(5)
+    server.credentials.close()
+
+
+def open_shell(port, username, password="pw", size=(80, 24)):
+    """Logs in and opens an interactive shell, returns its transport and channel."""
+    transport = paramiko.Transport(("127.0.0.1", port))
+    transport.start_client(timeout=10)
+    transport.auth_password(username, password)
+    channel = transport.open_session()
+    channel.get_pty(width=size[0], height=size[1])
+    channel.invoke_shell()
+    return transport, channel
+
+
+def test_login_shows_the_lobby(serving, db):
+    server, port = serving
+    db.create_user("alice", "pw")
+    transport, channel = open_shell(port, "alice")
+    try:
+        read_until(channel, "Welcome to LAN PONG, alice!")
+        assert server.connections == {"alice"}
+    finally:
+        transport.close()
+
+
+def test_new_user_registers_an_account(serving, db):
+    _, port = serving
+    db.create_user("new", "pw")
+    transport, channel = open_shell(port, "new")
+    try:
+        read_until(channel, "Enter your desired username")
+        channel.send("new\r")
+        read_until(channel, "Please enter another username")
+        channel.send("carol\r")
+        read_until(channel, "Enter your password")
+        channel.send("secret\r")
+        read_until(channel, "Account registered successfully")
+    finally:
+        transport.close()
+
+    transport, channel = open_shell(port, "carol", "secret")
+    try:
+        read_until(channel, "Welcome to LAN PONG, carol!")
+    finally:
+        transport.close()
+
+
+def test_resizing_the_terminal_keeps_the_session(serving, db):
+    _, port = serving
+    db.create_user("alice", "pw")
+    transport, channel = open_shell(port, "alice")
+    try:
+        read_until(channel, "Matchmaking")
+        channel.resize_pty(width=40, height=12)
+        channel.send("3")
+        read_until(channel, "No games are running right now.")
+        read_until(channel, "Matchmaking")
+    finally:
+        transport.close()
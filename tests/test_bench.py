@@ -0,0 +1,25 @@
+from lanpong.bench.__main__ import main
+from lanpong.bench.tick import create_games, play
+from lanpong.game.engine import PhysicsEngine
+from lanpong.server.scheduler import GameScheduler
+
+
+def test_bots_keep_the_ball_in_play():
+    engine = PhysicsEngine()
+    games, memory = create_games(3, engine)
+    assert memory > 0
+    scheduler = GameScheduler(engine=engine)
+    for game in games:
+        scheduler.add(game)
+    for _ in range(200):
+        play(games)
+        scheduler.step()
+    assert all(game.score == [0, 0] for game in games)
+    assert len(scheduler) == 3
+
+
+def test_tick_benchmark_reports_every_game_count(capsys):
+    main(["tick", "--games", "1,2", "--duration", "0"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split()[0] == "1" and lines[2].split()[0] == "2"
+    assert any(line.strip().startswith("str(game)") for line in lines)
@@ -0,0 +1,60 @@
+from lanpong.server.credentials import (
+    CredentialVerifier,
+    hash_password,
+    parse_hash,
+    verify_password,
+)
+
+# Cheap cost parameters, the defaults take tens of milliseconds per check.
+COST = dict(n=2**4, r=8, p=1)
+
+
+def test_hashed_and_plaintext_passwords_verify():
+    stored = hash_password("secret", **COST)
+    assert parse_hash(stored)[:3] == (2**4, 8, 1)
+    assert verify_password("secret", stored)
+    assert not verify_password("Secret", stored)
+    assert verify_password("plain", "plain")
+    assert not verify_password("plain", stored)
+
+
+def test_plaintext_passwords_are_rehashed_on_login(db):
+    db.create_user("alice", "pw")
+    verifier = CredentialVerifier(db, workers=1, **COST)
+    try:
+        assert verifier.login("alice", "nope").result() is None
+        user = verifier.login("alice", "pw").result()
+        assert user["username"] == "alice"
+        assert parse_hash(db.get_user("alice")["password"]) is not None
+        assert db.login("alice", "pw") is not None
+
+        # Already hashed with the current cost, no rehash.
+        assert verifier.login("alice", "pw").result() is not None
+        assert verifier.get_stats() == {
+            "logins": 2,
+            "failures": 1,
+            "overloaded": 0,
+            "rehashed": 1,
+        }
+    finally:
+        verifier.close()
+
+
+def test_logins_beyond_max_pending_fail_fast(db):
+    db.create_user("alice", "pw")
+    verifier = CredentialVerifier(db, workers=1, max_pending=0, **COST)
+    try:
+        assert verifier.login("alice", "pw").result() is None
+        assert verifier.get_stats()["overloaded"] == 1
+    finally:
+        verifier.close()
+
+
+def test_new_users_get_hashed_passwords(db):
+    verifier = CredentialVerifier(db, workers=1, **COST)
+    try:
+        verifier.create_user("bob", "pw").result()
+        assert verify_password("pw", db.get_user("bob")["password"])
+        assert db.get_user("bob")["password"] != "pw"
+    finally:
+        verifier.close()
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from lanpong.server.db import DB
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join("users.json"))
+
+
+def test_imports_existing_json(path):
+    with open(path, "w") as file:
+        json.dump([{"id": 7, "username": "sam", "password": "123", "score": 4}], file)
+    db = DB(path)
+    assert db.get_user("sam")["score"] == 4
+    db.create_user("mark", "pw")
+    assert db.get_user("mark")["id"] == 8
+    db.close()
+
+
+def test_changes_survive_restart_through_the_log(path):
+    db = DB(path)
+    db.create_user("alice", "pw")
+    db.update_user(1, {"score": 3})
+    db.close()
+
+    with open(path + ".log") as file:
+        assert len(file.readlines()) == 2
+
+    db = DB(path)
+    assert db.login("alice", "pw")["score"] == 3
+    assert not db.is_username_valid("alice")
+    db.close()
+
+
+def test_compaction_folds_log_into_snapshot(path, monkeypatch):
+    monkeypatch.setattr(DB, "COMPACT_THRESHOLD", 3)
+    db = DB(path)
+    db.create_user("alice", "pw")
+    for score in range(1, 4):
+        db.update_user(1, {"score": score})
+    db.close()
+
+    with open(path + ".log") as file:
+        assert file.read() == ""
+    with open(path) as file:
+        assert json.load(file)[0]["score"] == 3
+
+
+def test_replaying_a_compacted_record_is_harmless(path):
+    db = DB(path)
+    db.create_user("alice", "pw")
+    db.save_db()
+    # Simulate a crash right after the snapshot, before the log truncation.
+    with open(path + ".log", "w") as file:
+        file.write(json.dumps({"op": "create", "user": db.get_user("alice")}))
+        file.write("\n")
+    db.close()
+
+    db = DB(path)
+    assert len(db.users) == 1
+    db.close()
+
+
+def test_leaderboard_follows_score_updates(path):
+    db = DB(path)
+    for name in ["alice", "bob", "carol"]:
+        db.create_user(name, "pw")
+    db.update_user(2, {"score": 5})
+    db.update_user(3, {"score": 2})
+
+    assert [user["username"] for user in db.get_top_users(2)] == ["bob", "carol"]
+    assert db.get_rank("alice") == 3
+    assert db.get_rank("nobody") is None
+    db.close()
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+
+import numpy as np
+
+from lanpong.game.engine import PhysicsEngine
+from lanpong.game.game import Ball, BallView, Game, Paddle
+
+
+def reference_step(ball, left, right, rows, cols):
+    """The per-object physics the engine vectorizes."""
+    ball.update_position()
+    score = ball.handle_wall_collision(rows, cols)
+    ball.handle_paddle_collision(left, right)
+    ball.keep_within_bounds(rows, cols)
+    return score
+
+
+def test_step_matches_per_object_physics():
+    random.seed(0)
+    engine = PhysicsEngine(capacity=4)
+    rows, cols = Game.DEFAULT_ROWS, Game.DEFAULT_COLS
+    references = []
+    for _ in range(200):
+        slot = engine.allocate(rows, cols)
+        ball = Ball(
+            random.randint(1, rows - 2),
+            random.randint(1, cols - 2),
+            random.choice([-1, 1]),
+            random.choice([-1, 1]),
+        )
+        left = Paddle(random.randint(1, rows - 4), 1, 3)
+        right = Paddle(random.randint(1, rows - 4), cols - 2, 3)
+        engine.ball[slot] = ball.row, ball.col
+        engine.velocity[slot] = ball.row_velocity, ball.col_velocity
+        engine.paddle_row[slot] = left.row, right.row
+        engine.paddle_col[slot] = left.col, right.col
+        engine.paddle_length[slot] = left.length, right.length
+        engine.running[slot] = True
+        references.append((slot, ball, left, right))
+
+    slots, scores = engine.step(now=0)
+    stepped = dict(zip(slots.tolist(), scores.tolist()))
+
+    assert len(stepped) == 200
+    for slot, ball, left, right in references:
+        score = reference_step(ball, left, right, rows, cols)
+        assert stepped[slot] == score
+        assert engine.ball[slot].tolist() == [ball.row, ball.col]
+        assert engine.velocity[slot].tolist() == [ball.row_velocity, ball.col_velocity]
+
+
+def test_paused_and_idle_games_are_not_stepped():
+    engine = PhysicsEngine()
+    idle = engine.allocate(10, 10)
+    paused = engine.allocate(10, 10)
+    engine.running[paused] = True
+    engine.resume_at[paused] = 5
+
+    slots, _ = engine.step(now=1)
+    assert slots.tolist() == []
+    slots, _ = engine.step(now=5)
+    assert slots.tolist() == [paused]
+
+
+def test_game_is_a_view_into_the_engine():
+    engine = PhysicsEngine(capacity=1)
+    game = Game(engine=engine)
+    other = Game(engine=engine)
+
+    assert engine.capacity >= 2
+    game.paddle1.row = 4
+    assert engine.paddle_row[game.slot, PhysicsEngine.LEFT] == 4
+    assert other.paddle1.row == Game.DEFAULT_ROWS // 2
+    assert np.array_equal(engine.ball[game.slot], [game.ball.row, game.ball.col])
+
+
+def test_paddles_move_one_row_per_step_within_walls():
+    engine = PhysicsEngine(capacity=1)
+    rows, cols = Game.DEFAULT_ROWS, Game.DEFAULT_COLS
+    slot = engine.allocate(rows, cols)
+    engine.ball[slot] = rows // 2, cols // 2
+    engine.paddle_row[slot] = 2, rows - 5
+    engine.paddle_length[slot] = 3, 3
+    engine.paddle_direction[slot] = -1, 1
+    engine.running[slot] = True
+
+    engine.step(now=0)
+    assert engine.paddle_row[slot].tolist() == [1, rows - 4]
+    engine.step(now=0)
+    assert engine.paddle_row[slot].tolist() == [1, rows - 4]
+
+
+class SlowGrowingEngine(PhysicsEngine):
+    """Pauses between copying the velocities and swapping in the copy."""
+
+    def __init__(self, *args):
+        self.copied = threading.Event()
+        self.growing = False
+        super().__init__(*args)
+
+    def _grow(self, capacity):
+        self.growing = True
+        super()._grow(capacity)
+        self.growing = False
+
+    def __setattr__(self, name, value):
+        if name == "velocity" and getattr(self, "growing", False):
+            self.copied.set()
+            time.sleep(0.1)
+        super().__setattr__(name, value)
+
+
+def test_writes_are_not_lost_while_another_game_allocates():
+    engine = SlowGrowingEngine(1)
+    ball = BallView(engine, engine.allocate(24, 70), 12, 35, 1, 1)
+    allocating = threading.Thread(target=engine.allocate, args=(24, 70))
+    allocating.start()
+    engine.copied.wait(5)
+    # Written while the arrays are being replaced by grown copies.
+    ball.row_velocity = -1
+    allocating.join()
+    assert ball.row_velocity == -1
+    assert engine.capacity == 2
@@ -0,0 +1,22 @@
+from lanpong.game.engine import PhysicsEngine
+from lanpong.game.game import Game
+
+
+def test_network_stats_stay_in_the_players_half():
+    game = Game(engine=PhysicsEngine())
+    half = game.ncols // 2
+    left = "p95 123.4 p99 234.5 jit 12.3 loss 0%"
+    right = "a_rather_long_username's PING: 123.456ms"
+    game.update_network_stats(left, 1, line=1)
+    game.update_network_stats(right, 2, line=1)
+
+    row = game.screen[-Game.STATS_HEIGHT + 2].tobytes().decode()
+    assert row[0] == row[-1] == "+"
+    assert row[1:half] == left[: half - 1]
+    assert row[half:-1] == right[: game.ncols - half - 1]
+
+    # Shorter stats clear what is left of longer ones.
+    game.update_network_stats("p95 1.0", 1, line=1)
+    row = game.screen[-Game.STATS_HEIGHT + 2].tobytes().decode()
+    assert row[1:half] == "p95 1.0".ljust(half - 1)
+    assert row[half:-1] == right[: game.ncols - half - 1]
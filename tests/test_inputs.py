@@ -0,0 +1,120 @@
+import socket
+import threading
+import time
+
+from lanpong.server.inputs import InputSelector
+
+
+class FakeChannel:
+    """Socket with the recv_ready method of a paramiko Channel."""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+    def recv_ready(self):
+        self.sock.setblocking(False)
+        try:
+            return bool(self.sock.recv(1, socket.MSG_PEEK))
+        except BlockingIOError:
+            return False
+        finally:
+            self.sock.setblocking(True)
+
+
+def test_pending_input_is_read_at_once():
+    client, server = socket.socketpair()
+    received = []
+    selector = InputSelector()
+    channel = FakeChannel(server)
+    selector.register(channel, received.append)
+    selector.poll(0)
+
+    client.sendall(b"wws")
+    selector.poll(1)
+    assert received == [b"wws"]
+
+    # Unregistered on end of file.
+    client.close()
+    selector.poll(1)
+    assert channel not in selector.selector.get_map()
+    server.close()
+
+
+def test_callback_runs_on_selector_thread():
+    client, server = socket.socketpair()
+    received = threading.Event()
+    selector = InputSelector()
+    selector.start()
+    try:
+        selector.register(FakeChannel(server), lambda data: received.set())
+        client.sendall(b"s")
+        assert received.wait(1)
+    finally:
+        selector.stop()
+        client.close()
+        server.close()
+
+
+def test_unregister_applied_before_end_of_file_is_seen():
+    client, server = socket.socketpair()
+    selector = InputSelector()
+    channel = FakeChannel(server)
+    selector.register(channel, lambda data: None)
+    selector.poll(0)
+
+    # The session leaves while its client disconnects, in the same batch.
+    selector.unregister(channel)
+    client.close()
+    selector.poll(1)
+    selector.poll(0)
+    assert channel not in selector.selector.get_map()
+    server.close()
+
+
+def test_failing_callback_does_not_stop_the_selector_thread():
+    first, first_server = socket.socketpair()
+    second, second_server = socket.socketpair()
+    received = threading.Event()
+
+    def fail(data):
+        raise ValueError(data)
+
+    selector = InputSelector()
+    selector.start()
+    try:
+        selector.register(FakeChannel(first_server), fail)
+        selector.register(FakeChannel(second_server), lambda data: received.set())
+        first.sendall(b"w")
+        time.sleep(0.1)
+        second.sendall(b"s")
+        assert received.wait(1)
+    finally:
+        selector.stop()
+        for sock in (first, first_server, second, second_server):
+            sock.close()
+
+
+def test_input_after_a_confirmed_unregister_is_left_to_the_channel():
+    client, server = socket.socketpair()
+    received = []
+    selector = InputSelector()
+    selector.start()
+    try:
+        channel = FakeChannel(server)
+        assert selector.register(channel, received.append).wait(1)
+        assert selector.unregister(channel).wait(1)
+        # E.g. the lobby reading the key that follows a spectator's "q".
+        client.sendall(b"1")
+        time.sleep(0.1)
+        assert received == []
+        assert server.recv(1) == b"1"
+    finally:
+        selector.stop()
+        client.close()
+        server.close()
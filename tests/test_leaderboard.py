@@ -0,0 +1,31 @@
+from lanpong.server.leaderboard import Leaderboard
+
+
+def test_top_and_rank_follow_score_updates():
+    leaderboard = Leaderboard()
+    for user_id, score in [(1, 10), (2, 30), (3, 20)]:
+        leaderboard.update(user_id, score)
+    assert leaderboard.top(2) == [2, 3]
+    assert leaderboard.rank(1) == 3
+
+    leaderboard.update(1, 40)
+    assert leaderboard.top(10) == [1, 2, 3]
+    assert leaderboard.rank(3) == 3
+
+
+def test_ties_keep_registration_order():
+    leaderboard = Leaderboard()
+    leaderboard.update(2, 5)
+    leaderboard.update(1, 5)
+    assert leaderboard.top(2) == [1, 2]
+
+
+def test_version_changes_only_with_the_ranking():
+    leaderboard = Leaderboard()
+    leaderboard.update(1, 0)
+    version = leaderboard.version
+    leaderboard.update(1, 0)
+    assert leaderboard.version == version
+    leaderboard.remove(1)
+    assert leaderboard.version == version + 1
+    assert leaderboard.rank(1) is None
@@ -0,0 +1,91 @@
+from lanpong.server.matchmaking import Matchmaker
+
+
+def test_players_are_paired_in_arrival_order():
+    matchmaker = Matchmaker()
+    first, first_id = matchmaker.join("alice")
+    assert first_id == 1
+    assert len(matchmaker) == 1
+
+    assert matchmaker.join("bob") == (first, 2)
+    assert len(matchmaker) == 0
+    assert matchmaker.get_stats()["matches"] == 1
+
+
+def test_cancelled_games_are_skipped():
+    matchmaker = Matchmaker(rating_window=10)
+    first, _ = matchmaker.join("alice", 0)
+    second, _ = matchmaker.join("bob", 100)
+
+    assert matchmaker.cancel(first)
+    assert not matchmaker.cancel(first)
+    assert matchmaker.join("carol", 100) == (second, 2)
+    assert len(matchmaker) == 0
+
+
+def test_rating_window_pairs_closest_score():
+    matchmaker = Matchmaker(rating_window=5, window_growth=0)
+    low, _ = matchmaker.join("alice", 0)
+    high, _ = matchmaker.join("bob", 20)
+
+    assert matchmaker.join("carol", 18) == (high, 2)
+    # Too far from alice, opens a new game.
+    game, player_id = matchmaker.join("dave", 30)
+    assert game is not low and player_id == 1
+    assert len(matchmaker) == 2
+
+
+def test_rating_window_widens_while_waiting(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    matchmaker = Matchmaker(rating_window=5, window_growth=1)
+    waiting, _ = matchmaker.join("alice", 0)
+
+    now[0] = 10.0
+    assert matchmaker.join("bob", 15) == (waiting, 2)
+    assert matchmaker.get_stats()["mean_wait_ms"] == 10000
+
+
+def test_position_follows_arrival_order():
+    matchmaker = Matchmaker(rating_window=0, window_growth=0)
+    first, _ = matchmaker.join("alice", 0)
+    second, _ = matchmaker.join("bob", 10)
+    assert matchmaker.position(second) == 2
+
+    matchmaker.cancel(first)
+    assert matchmaker.position(second) == 1
+    assert matchmaker.position(first) is None
+
+
+def test_waiting_players_are_paired_once_their_windows_overlap(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    matchmaker = Matchmaker(rating_window=5, window_growth=1)
+    first, _ = matchmaker.join("alice", 0)
+    now[0] = 5.0
+    second, _ = matchmaker.join("bob", 15)
+    assert matchmaker.rematch() == []
+
+    # alice's window is 5 + 10 wide now, bob's only 5 + 5.
+    now[0] = 10.0
+    assert matchmaker.rematch() == [first]
+    assert first.is_full() and first.player2.username == "bob"
+    assert second.is_full_event.is_set()
+    woken = []
+    second.when_full(lambda: woken.append(True))
+    assert woken == [True]
+    assert matchmaker.follow(second, 1) == (first, 2)
+    assert matchmaker.follow(first, 1) == (first, 1)
+    assert len(matchmaker) == 0
+    assert matchmaker.get_stats()["matches"] == 1
+
+
+def test_rematch_leaves_players_out_of_each_others_window(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    matchmaker = Matchmaker(rating_window=5, window_growth=1)
+    matchmaker.join("alice", 0)
+    matchmaker.join("bob", 100)
+    now[0] = 10.0
+    assert matchmaker.rematch() == []
+    assert len(matchmaker) == 2
@@ -0,0 +1,145 @@
+import socket
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from lanpong.game.render import encode_frame
+from lanpong.server.output import FramePacer, FrameWriter
+
+
+class FakeChannel:
+    """
+    Records what is sent, accepting at most `window` bytes at a time.
+
+    Like a paramiko Channel, data is written to the connection's socket right
+    away, blocking while its send buffer is full.
+    """
+
+    def __init__(self, window):
+        self.out_window_size = window
+        self.data = b""
+        self.sock, self.peer = socket.socketpair()
+
+    def get_transport(self):
+        return SimpleNamespace(sock=self.sock)
+
+    def send_ready(self):
+        return self.out_window_size > 0
+
+    def send(self, data):
+        sent = min(len(data), self.out_window_size)
+        self.sock.sendall(data[:sent])
+        self.data += data[:sent]
+        self.out_window_size -= sent
+        return sent
+
+    def close(self):
+        self.sock.close()
+        self.peer.close()
+
+
+def frames(count):
+    frame = None
+    for tick in range(count):
+        frame = encode_frame(tick, np.full((2, 2), bytes([ord("a") + tick])), frame)
+        yield frame
+
+
+def test_frames_are_dropped_while_the_window_is_full():
+    first, second, third = frames(3)
+    channel = FakeChannel(window=len(first.data) - 1)
+    channel.peer.setblocking(False)
+    writer = FrameWriter(channel)
+
+    assert writer.write(first)
+    assert channel.data == first.data[:-1]
+    assert not writer.write(second)
+
+    # Once the window reopens, the rest of the first frame goes out, followed
+    # by the latest frame diffed against the first.
+    channel.out_window_size = 1000
+    assert writer.write(third)
+    assert channel.data.startswith(first.data)
+    assert writer.get_stats() == {
+        "frames_sent": 2,
+        "frames_dropped": 1,
+        "bytes_sent": len(channel.data),
+    }
+    assert writer.renderer.last is third
+    channel.close()
+
+
+def test_a_frame_is_written_once():
+    (frame,) = frames(1)
+    channel = FakeChannel(window=1000)
+    writer = FrameWriter(channel)
+    assert writer.write(frame)
+    assert not writer.write(frame)
+    assert channel.data == frame.data
+    assert writer.frames_dropped == 0
+    channel.close()
+
+
+def test_frames_are_dropped_once_the_client_stops_reading():
+    # The SSH window is wide open, but nothing is read from the socket.
+    channel = FakeChannel(window=2**31)
+    writer = FrameWriter(channel)
+    screens = (np.full((40, 200), bytes([ord("a") + tick % 26])) for tick in range(500))
+    frame = None
+
+    def write_all():
+        nonlocal frame
+        for tick, screen in enumerate(screens):
+            frame = encode_frame(tick, screen, frame)
+            writer.write(frame)
+
+    thread = threading.Thread(target=write_all, daemon=True)
+    thread.start()
+    thread.join(5)
+    try:
+        assert not thread.is_alive()
+        assert writer.frames_dropped > 0
+        assert writer.frames_sent + writer.frames_dropped == 500
+    finally:
+        channel.close()
+
+
+def counters(bytes_sent, frames_sent, frames_dropped=0):
+    return SimpleNamespace(
+        bytes_sent=bytes_sent, frames_sent=frames_sent, frames_dropped=frames_dropped
+    )
+
+
+def test_pacer_speeds_up_on_a_clear_link():
+    pacer = FramePacer(now=0)
+    assert pacer.fps == FramePacer.INITIAL_FPS
+    for second in range(1, 20):
+        pacer.update(counters(1000 * second, 20 * second), rtt=1, now=second)
+    assert pacer.fps == FramePacer.MAX_FPS
+
+
+def test_pacer_backs_off_to_the_drained_rate():
+    pacer = FramePacer(now=0)
+    # 8 frames of 100 bytes got through, the others were dropped.
+    pacer.update(counters(800, 8, frames_dropped=12), rtt=1, now=1)
+    assert pacer.throughput == 800
+    assert pacer.fps == 8
+    pacer.update(counters(800, 8, frames_dropped=100), now=2)
+    assert pacer.fps == FramePacer.MIN_FPS
+
+
+def test_pacer_backs_off_when_the_round_trip_grows():
+    pacer = FramePacer(now=0)
+    pacer.update(counters(1000, 20), rtt=10, now=1)
+    assert pacer.fps == 25
+    pacer.update(counters(2000, 40), rtt=100, now=2)
+    assert pacer.base_rtt == 10
+    assert pacer.fps == 12.5
+
+
+def test_pacer_keeps_a_steady_cadence():
+    pacer = FramePacer(now=0)
+    assert pacer.delay(now=0.01) == 0.04
+    # A frame sent late isn't made up for.
+    assert pacer.delay(now=0.2) == 0
@@ -0,0 +1,47 @@
+import socket
+
+from lanpong.server.ping import LatencyStats, Ping, tcp_info_rtt
+
+
+def test_average_of_probe_samples():
+    samples = iter([1.0, 2.0, None, 6.0])
+    ping = Ping(lambda: next(samples))
+    assert ping.get() == 1.0
+    assert ping.get() == 1.5
+    # A failed probe keeps the previous average.
+    assert ping.get() == 1.5
+    assert ping.get() == 3.0
+
+
+def test_no_samples():
+    assert Ping(lambda: None).get() == 0.0
+
+
+def test_tcp_info_rtt_on_connected_socket():
+    server = socket.create_server(("127.0.0.1", 0))
+    client = socket.create_connection(server.getsockname())
+    try:
+        rtt = tcp_info_rtt(client)
+        assert rtt is None or rtt >= 0
+    finally:
+        client.close()
+        server.close()
+
+
+def test_ring_buffer_keeps_most_recent_samples():
+    stats = LatencyStats(size=4)
+    for rtt in [100, 1, 2, 3, 4]:
+        stats.add(rtt)
+    assert len(stats) == 4
+    assert stats.mean == 2.5
+    assert stats.percentile(50) == 2
+    assert stats.percentile(99) == 4
+
+
+def test_jitter_and_loss():
+    stats = LatencyStats()
+    stats.add(10)
+    stats.add(26)
+    stats.add_lost()
+    assert stats.jitter == 1.0
+    assert stats.loss == 1 / 3
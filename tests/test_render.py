@@ -0,0 +1,168 @@
+import numpy as np
+
+from lanpong.game.game import Game
+from lanpong.game.render import (
+    CLEAR_SCREEN,
+    HIDE_CURSOR,
+    DeltaRenderer,
+    FrameBroadcaster,
+    Viewport,
+    diff_screens,
+    encode_frame,
+    get_crlf_buffer,
+    render_view,
+)
+
+
+def frames(*screens):
+    frame = None
+    for tick, screen in enumerate(screens):
+        frame = encode_frame(tick, screen, frame)
+        yield frame
+
+
+def test_first_frame_is_full_redraw():
+    renderer = DeltaRenderer()
+    (frame,) = frames(Game.get_blank_screen())
+    assert renderer.render(frame).startswith(CLEAR_SCREEN.encode())
+
+
+def test_only_changed_cells_are_sent():
+    renderer = DeltaRenderer()
+    blank = Game.get_blank_screen()
+    changed = blank.copy()
+    changed[5, 10:12] = b"*"
+    changed[7, 3] = b"|"
+    first, second, third = frames(blank, blank, changed)
+
+    renderer.render(first)
+    assert renderer.render(second) == b""
+    assert renderer.render(third) == b"\x1b[6;11H**\x1b[8;4H|"
+    # Already up to date.
+    assert renderer.render(third) == b""
+
+
+def test_delta_is_encoded_once_per_frame():
+    blank = Game.get_blank_screen()
+    changed = blank.copy()
+    changed[1, 1] = b"*"
+    _, frame = frames(blank, changed)
+    assert frame.delta == b"\x1b[2;2H*"
+    assert not frame.screen.flags.writeable
+
+
+def test_skipped_frames_are_diffed_against_the_last_one_sent():
+    renderer = DeltaRenderer()
+    screens = [Game.get_blank_screen() for _ in range(3)]
+    screens[1][1, 1] = b"*"
+    screens[2][2, 2] = b"*"
+    first, _, third = frames(*screens)
+
+    renderer.render(first)
+    assert renderer.render(third) == b"\x1b[3;3H*"
+
+
+def test_shape_change_forces_full_redraw():
+    renderer = DeltaRenderer()
+    board, message = frames(
+        Game.get_blank_screen(), Game.draw_message("player scores!")
+    )
+    renderer.render(board)
+    assert message.delta is None
+    assert renderer.render(message).startswith(CLEAR_SCREEN.encode())
+
+
+def test_diff_against_blank_board():
+    previous = Game.get_blank_screen()
+    game = Game()
+    delta = diff_screens(previous, game.screen)
+    # The board differs from a blank screen by ball, paddles and header.
+    assert "\x1b[13;36H*" in delta
+    assert "\x1b[13;2H|" in delta and "\x1b[13;69H|" in delta
+    assert "\x1b[25;34HStatistics:" in delta
+
+
+def test_screen_to_tui_serializes_the_crlf_buffer():
+    screen = Game.get_blank_screen(2, 3, stats_height=0)
+    assert get_crlf_buffer(screen) is not None
+    assert Game.screen_to_tui(screen) == "+-+\r\n+-+\r\n"
+    # Slices and plain arrays take the copying path.
+    assert Game.screen_to_tui(screen[1:]) == "+-+\r\n"
+    assert Game.screen_to_tui(np.array([[b"a", b"b"]])) == "ab\r\n"
+
+
+def test_broadcaster_waits_for_a_newer_frame():
+    broadcaster = FrameBroadcaster()
+    assert broadcaster.wait(timeout=0) is None
+    first, second = frames(np.full((2, 2), b"a"), np.full((2, 2), b"b"))
+    broadcaster.publish(first)
+    assert broadcaster.wait() is first
+    # Nothing newer than tick 0 yet, the latest frame is returned on timeout.
+    assert broadcaster.wait(first.tick, timeout=0) is first
+    broadcaster.publish(second)
+    assert broadcaster.wait(first.tick) is second
+
+
+def test_broadcaster_counts_viewers_and_closes():
+    broadcaster = FrameBroadcaster()
+    with broadcaster.watch():
+        with broadcaster.watch():
+            assert broadcaster.viewers == 2
+        assert broadcaster.viewers == 1
+        broadcaster.close()
+        assert broadcaster.wait() is None
+    assert broadcaster.viewers == 0
+
+
+def test_viewport_centers_or_crops_the_screen():
+    viewport = Viewport.fit((4, 10), (8, 6))
+    assert (viewport.top, viewport.left) == (2, 0)
+    screen = np.arange(40).reshape(4, 10)
+    assert viewport.crop(screen).shape == (4, 6)
+    assert viewport.crop(screen)[0, 0] == 2
+
+
+def test_small_terminals_get_cropped_rows_without_wrapping():
+    screen = np.full((3, 5), b"x")
+    screen[:, 0] = b"|"
+    (frame,) = frames(screen)
+    data = render_view(frame, (2, 3))
+    assert data == (
+        CLEAR_SCREEN.encode() + b"\x1b[1;1Hxxx\x1b[2;1Hxxx" + HIDE_CURSOR.encode()
+    )
+    assert b"\r\n" not in data
+    # Cached for every viewer with the same terminal size.
+    assert render_view(frame, (2, 3)) is data
+
+
+def test_deltas_are_offset_into_larger_terminals():
+    renderer = DeltaRenderer()
+    renderer.resize((10, 10))
+    blank = np.full((2, 2), b" ")
+    changed = blank.copy()
+    changed[1, 1] = b"*"
+    first, second = frames(blank, changed)
+    renderer.render(first)
+    assert renderer.render(second) == b"\x1b[6;6H*"
+    assert second.views[((10, 10), "delta")] == b"\x1b[6;6H*"
+
+    # A resize forces a full redraw at the new size.
+    renderer.resize((2, 2))
+    (third,) = frames(changed)
+    assert renderer.render(third).startswith(CLEAR_SCREEN.encode())
+
+
+def test_delta_only_compares_the_given_rows():
+    blank = Game.get_blank_screen()
+    changed = blank.copy()
+    changed[2, 2] = changed[4, 4] = b"*"
+    (first,) = frames(blank)
+    assert encode_frame(1, changed, first, rows=[4]).delta == b"\x1b[5;5H*"
+    assert diff_screens(blank, changed, rows=[2, 4]) == "\x1b[3;3H*\x1b[5;5H*"
+
+
+def test_full_redraw_is_encoded_on_demand():
+    first, second = frames(Game.get_blank_screen(), Game.get_blank_screen())
+    assert None not in second.views
+    assert second.data.startswith(CLEAR_SCREEN.encode())
+    assert second.views[None] is second.data
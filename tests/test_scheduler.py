@@ -0,0 +1,120 @@
+from contextlib import ExitStack
+
+from lanpong.game.engine import PhysicsEngine
+from lanpong.game.game import Game
+from lanpong.game.render import encode_delta
+from lanpong.server.scheduler import GameScheduler
+
+
+def make_game(scheduler):
+    game = Game(engine=scheduler.engine)
+    game.initialize_player("alice")
+    game.initialize_player("bob")
+    return game
+
+
+def test_step_only_advances_started_games():
+    scheduler = GameScheduler(engine=PhysicsEngine())
+    waiting, playing = make_game(scheduler), make_game(scheduler)
+    scheduler.add(waiting)
+    scheduler.add(playing)
+    playing.set_player_ready(1, True)
+    playing.set_player_ready(2, True)
+
+    scheduler.step()
+
+    assert waiting.ball.get_col() == Game.DEFAULT_COLS // 2
+    assert playing.ball.get_col() == Game.DEFAULT_COLS // 2 + 1
+    assert scheduler.tick == 1
+
+
+def test_finished_games_leave_the_schedule():
+    scheduler = GameScheduler(engine=PhysicsEngine())
+    game = make_game(scheduler)
+    game.set_player_ready(1, True)
+    game.set_player_ready(2, True)
+    scheduler.add(game)
+
+    game.loser = 1
+    scheduler.step()
+
+    assert len(scheduler) == 0
+
+
+def test_tick_once_waits_until_next_deadline():
+    scheduler = GameScheduler(tick_interval=10)
+    delay = scheduler.tick_once()
+    assert 9 < delay <= 10
+    assert scheduler.get_stats()["overruns"] == 0
+
+
+def test_overrun_resynchronizes_clock(monkeypatch):
+    times = iter([0.0, 0.2])
+    monkeypatch.setattr("time.monotonic", lambda: next(times))
+    scheduler = GameScheduler(tick_interval=0.05)
+
+    # The tick took longer than several intervals, run the next one right away.
+    assert scheduler.tick_once() == 0
+    assert scheduler.overruns == 1
+
+
+def test_started_games_publish_one_frame_per_tick():
+    scheduler = GameScheduler(engine=PhysicsEngine())
+    game = make_game(scheduler)
+    scheduler.add(game)
+    scheduler.step()
+    assert game.frame is None
+
+    game.set_player_ready(1, True)
+    game.set_player_ready(2, True)
+    with game.broadcaster.watch(spectator=False):
+        scheduler.step()
+        scheduler.step()
+    assert game.wait_for_frame(0, timeout=0).tick == 1
+    assert game.frame.delta == b"\x1b[14;37H \x1b[15;38H*"
+
+
+def test_frames_are_only_encoded_while_someone_watches():
+    scheduler = GameScheduler(engine=PhysicsEngine())
+    game = make_game(scheduler)
+    game.set_player_ready(1, True)
+    game.set_player_ready(2, True)
+    scheduler.add(game)
+    scheduler.step()
+    assert game.frame is None
+
+    previous = None
+    for tick in range(30):
+        # Viewers come and go, the changes made meanwhile add up.
+        with ExitStack() as stack:
+            if tick % 3 != 1:
+                stack.enter_context(game.broadcaster.watch())
+            game.queue_input(1, b"ws"[tick // 5 % 2 : tick // 5 % 2 + 1])
+            game.update_network_stats(f"PING: {tick}ms", 1 + tick % 2)
+            scheduler.step()
+        frame = game.frame
+        if previous is not None and frame is not previous:
+            assert frame.tick == previous.tick + 1
+            assert frame.delta == encode_delta(previous.screen, frame.screen)
+        previous = frame
+    assert previous.tick == 19
+
+
+def test_queued_input_moves_paddle_on_next_tick():
+    scheduler = GameScheduler(engine=PhysicsEngine())
+    game = make_game(scheduler)
+    game.set_player_ready(1, True)
+    game.set_player_ready(2, True)
+    scheduler.add(game)
+    row = game.player1.paddle.row
+
+    # Only the last paddle key of a burst counts.
+    game.queue_input(1, b"sxw")
+    assert game.player1.paddle.row == row
+    scheduler.step()
+    assert game.player1.paddle.row == row - 1
+    # The paddle keeps its direction until stopped.
+    game.queue_input(1, b" ")
+    scheduler.step()
+    scheduler.step()
+    assert game.player1.paddle.row == row - 1
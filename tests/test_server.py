@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+
+import paramiko
+
+from lanpong.bench.handshake import write_host_key
+from lanpong.game.game import Game
+from lanpong.server.credentials import CredentialVerifier
+from lanpong.server.db import DB
+from lanpong.server.server import (
+    Server,
+    LobbyScreen,
+    draw_lobby_screen,
+    get_games_screen,
+    get_waiting_status,
+)
+
+
+def render_uncached(db, username):
+    screen, row = draw_lobby_screen(db)
+    welcome = f"Welcome to LAN PONG, {username}! Your rank: #{db.get_rank(username)}"
+    start = (screen.shape[1] - len(welcome)) // 2
+    screen[row, start : start + len(welcome)] = list(welcome)
+    return Game.screen_to_tui(screen)
+
+
+def test_lobby_screen_is_rerendered_when_leaderboard_changes(tmpdir):
+    db = DB(str(tmpdir.join("users.json")))
+    db.create_user("alice", "pw")
+    db.create_user("bob", "pw")
+    lobby = LobbyScreen(db)
+
+    assert lobby.get("alice") == render_uncached(db, "alice")
+    assert lobby.get("bob") == render_uncached(db, "bob")
+    version = lobby.version
+
+    db.update_user(2, {"score": 1})
+    assert lobby.get("alice") == render_uncached(db, "alice")
+    assert "1. bob - 1" in lobby.get("alice")
+    assert lobby.version != version
+    db.close()
+
+
+def test_lobby_screen_fits_long_usernames(db):
+    lobby = LobbyScreen(db)
+    for length in (20, 40, 46, 68, 100):
+        username = "x" * length
+        db.create_user(username, "pw")
+        lines = lobby.get(username).split("\r\n")
+        assert all(len(line) == Game.DEFAULT_COLS for line in lines if line)
+        welcome = next(line for line in lines if "Welcome" in line)
+        assert welcome[0] == welcome[-1] == "+"
+        # The rank is dropped first.
+        assert ("Your rank" in welcome) == (length <= 32)
+        assert (username in welcome) == (length <= 46)
+
+
+def test_waiting_status_overwrites_one_line():
+    status = get_waiting_status(3, 12.7, tick=1)
+    assert status.startswith("\x1b[15;2H")
+    assert len(status) - len("\x1b[15;2H") == Game.DEFAULT_COLS - 2
+    assert "/ Waiting 12s - position in queue: 3" in status
+
+
+def test_games_screen_lists_players_and_viewers():
+    game = Game()
+    game.initialize_player("alice")
+    game.initialize_player("bob")
+    with game.broadcaster.watch():
+        screen = get_games_screen([game])
+    assert "[1] alice vs bob (0-0, 1 watching)" in screen
+
+
+def connect(server, username, password="pw"):
+    """Serves one client over a socketpair, returns its shell and server thread."""
+    client_socket, server_socket = socket.socketpair()
+    assert server.admission.admit("127.0.0.1") == "admit"
+    thread = threading.Thread(target=server.handle_client, args=(server_socket,))
+    thread.start()
+    transport = paramiko.Transport(client_socket)
+    transport.start_client(timeout=10)
+    transport.auth_password(username, password)
+    channel = transport.open_session()
+    channel.get_pty()
+    channel.invoke_shell()
+    return transport, channel, thread
+
+
+def read_until(channel, text, timeout=5):
+    data = ""
+    deadline = time.monotonic() + timeout
+    while text not in data and time.monotonic() < deadline:
+        if channel.recv_ready():
+            data += channel.recv(65536).decode()
+        else:
+            time.sleep(0.01)
+    assert text in data
+    return data
+
+
+def test_client_dropping_while_waiting_frees_its_slot(tmpdir, db):
+    db.create_user("alice", "pw")
+    server = Server(
+        write_host_key(str(tmpdir), "ed25519"),
+        db=db,
+        credentials=CredentialVerifier(db, n=2**4),
+    )
+    server.WAITING_STATUS_INTERVAL = 0.05
+    try:
+        transport, channel, thread = connect(server, "alice")
+        read_until(channel, "Matchmaking")
+        channel.send("1")
+        read_until(channel, "Waiting")
+        transport.close()
+        thread.join(10)
+
+        assert not thread.is_alive()
+        assert server.admission.get_stats()["connections"] == 0
+        assert len(server.matchmaker) == 0
+        assert server.connections == set()
+    finally:
+        server.credentials.close()
+
+
+def test_new_user_registers_through_the_shared_flow(tmpdir, db):
+    db.create_user("new", "pw")
+    server = Server(
+        write_host_key(str(tmpdir), "ed25519"),
+        db=db,
+        credentials=CredentialVerifier(db, n=2**4),
+    )
+    try:
+        transport, channel, thread = connect(server, "new")
+        read_until(channel, "Enter your desired username")
+        channel.send("carol\r")
+        read_until(channel, "Enter your password")
+        channel.send("secret\r")
+        read_until(channel, "Account registered successfully")
+        thread.join(10)
+        transport.close()
+
+        assert server.credentials.login("carol", "secret").result() is not None
+    finally:
+        server.credentials.close()
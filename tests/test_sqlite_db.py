@@ -0,0 +1,96 @@
+import json
+import threading
+
+import pytest
+
+from lanpong.server.db import DB
+from lanpong.server.sqlite_db import SQLiteDB
+
+
+@pytest.fixture
+def db(tmpdir):
+    db = SQLiteDB(str(tmpdir.join("users.db")), json_filename=None)
+    yield db
+    db.close()
+
+
+def test_uses_wal_journal(db):
+    with db.connection() as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_same_interface_as_json_db(db):
+    db.create_user("alice", "pw")
+    db.create_user("bob", "pw", score=5)
+    with pytest.raises(ValueError):
+        db.create_user("alice", "other")
+
+    alice = db.login("alice", "pw")
+    assert db.login("alice", "wrong") is None
+    db.update_user(alice["id"], {"score": 9, "public_key": "ssh-ed25519 AAAA"})
+
+    assert db.get_user("alice")["public_key"] == "ssh-ed25519 AAAA"
+    assert [u["username"] for u in db.get_top_users(10)] == ["alice", "bob"]
+    assert not db.is_username_valid("bob")
+    assert not db.is_username_valid("with space")
+
+
+def test_migrates_users_json(tmpdir):
+    json_path = str(tmpdir.join("users.json"))
+    with open(json_path, "w") as file:
+        json.dump([{"id": 3, "username": "sam", "password": "1", "score": 4}], file)
+    json_db = DB(json_path)
+    json_db.update_user(3, {"score": 6})
+    json_db.close()
+
+    db = SQLiteDB(str(tmpdir.join("users.db")), json_filename=json_path)
+    assert db.get_user("sam") == {
+        "id": 3,
+        "username": "sam",
+        "password": "1",
+        "score": 6,
+        "public_key": None,
+        "key_type": None,
+    }
+    # Importing again is a no-op once users exist.
+    assert db.import_json(json_path) == 0
+    db.close()
+
+
+def test_rank(db):
+    db.create_user("alice", "pw")
+    db.create_user("bob", "pw", score=5)
+    db.create_user("carol", "pw")
+    assert [db.get_rank(name) for name in ["alice", "bob", "carol"]] == [2, 1, 3]
+
+    db.update_user(db.get_user("carol")["id"], {"score": 9})
+    assert [db.get_rank(name) for name in ["alice", "bob", "carol"]] == [3, 2, 1]
+    assert db.get_rank("nobody") is None
+
+
+def test_threads_share_a_bounded_pool_of_connections(db):
+    def login():
+        db.get_user("alice")
+
+    threads = [threading.Thread(target=login) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db._pool.qsize() == SQLiteDB.POOL_SIZE
+
+
+def test_concurrent_score_updates_bump_the_version_every_time(db):
+    db.create_user("alice", "pw")
+    version = db.get_leaderboard_version()
+    user_id = db.get_user("alice")["id"]
+    threads = [
+        threading.Thread(target=db.update_user, args=(user_id, {"score": score}))
+        for score in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db.get_leaderboard_version() == version + 20
+    assert db.get_rank("alice") == 1
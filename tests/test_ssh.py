@@ -0,0 +1,103 @@
+import socket
+import threading
+from types import SimpleNamespace
+
+import paramiko
+import pytest
+
+from lanpong.bench.handshake import write_host_key
+from lanpong.server.ssh import (
+    PublicKeyCache,
+    SSHServer,
+    configure_transport,
+    load_host_keys,
+)
+
+
+def test_host_keys_prefer_ed25519(tmpdir):
+    rsa = write_host_key(str(tmpdir), "rsa")
+    ed25519 = write_host_key(str(tmpdir), "ed25519")
+    missing = str(tmpdir.join("missing"))
+
+    keys = load_host_keys([rsa, missing, ed25519])
+    assert [key.get_name() for key in keys] == ["ssh-ed25519", "ssh-rsa"]
+    with pytest.raises(FileNotFoundError):
+        load_host_keys(missing)
+
+
+def test_configure_transport_keeps_supported_algorithms_in_order(tmpdir):
+    keys = load_host_keys(write_host_key(str(tmpdir), "ed25519"))
+    left, right = socket.socketpair()
+    transport = paramiko.Transport(left)
+    try:
+        configure_transport(
+            transport,
+            keys,
+            kex=["unknown-kex", "ecdh-sha2-nistp256", "curve25519-sha256@libssh.org"],
+            ciphers=["aes256-ctr", "aes128-ctr"],
+        )
+        options = transport.get_security_options()
+        assert options.kex == (
+            "ecdh-sha2-nistp256",
+            "curve25519-sha256@libssh.org",
+        )
+        assert options.ciphers == ("aes256-ctr", "aes128-ctr")
+        assert list(transport.server_key_dict) == ["ssh-ed25519"]
+    finally:
+        transport.close()
+        right.close()
+
+
+def test_public_keys_are_parsed_once_per_stored_key(tmpdir, monkeypatch, db):
+    db.create_user("alice", "pw")
+    server = SimpleNamespace(
+        db=db,
+        lock=threading.Lock(),
+        connections=set(),
+        public_keys=PublicKeyCache(),
+        credentials=None,
+    )
+    key, other = (
+        load_host_keys(write_host_key(str(tmpdir.mkdir(name)), "ed25519"))[0]
+        for name in ("key", "other")
+    )
+    user_id = db.get_user("alice")["id"]
+    db.update_user(
+        user_id,
+        {"public_key": f"ssh-ed25519 {key.get_base64()} alice", "key_type": "ed25519"},
+    )
+
+    parsed = []
+    key_class = PublicKeyCache.KEY_CLASSES["ed25519"]
+    monkeypatch.setitem(
+        PublicKeyCache.KEY_CLASSES,
+        "ed25519",
+        lambda data: parsed.append(data) or key_class(data=data),
+    )
+    ssh_server = SSHServer(server)
+    assert ssh_server.check_auth_publickey("alice", other) == paramiko.AUTH_FAILED
+    assert ssh_server.check_auth_publickey("alice", key) == paramiko.AUTH_SUCCESSFUL
+    assert len(parsed) == 1
+
+    # A replaced key is parsed again, even without invalidation.
+    db.update_user(user_id, {"public_key": f"ssh-ed25519 {other.get_base64()}"})
+    assert ssh_server.check_auth_publickey("alice", other) == paramiko.AUTH_SUCCESSFUL
+    assert len(parsed) == 2
+
+
+def test_terminal_size_follows_window_changes():
+    server = SSHServer(
+        SimpleNamespace(
+            db=None,
+            lock=None,
+            connections=set(),
+            public_keys=None,
+            credentials=None,
+        )
+    )
+    server.check_channel_pty_request(None, "xterm", 80, 24, 0, 0, b"")
+    assert server.term_size == (24, 80)
+    server.check_channel_window_change_request(None, 40, 12, 0, 0)
+    assert server.term_size == (12, 40)
+    server.check_channel_window_change_request(None, 0, 0, 0, 0)
+    assert server.term_size is None